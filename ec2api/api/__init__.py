@@ -17,14 +17,18 @@ Starting point for routing EC2 requests.
 """
 import hashlib
 import json
+import os
 import sys
 
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
+from oslo_utils import encodeutils
 from oslo_utils import timeutils
 import requests
+from requests import adapters as requests_adapters
 import six
+from six.moves import http_cookiejar
 import webob
 import webob.dec
 import webob.exc
@@ -33,8 +37,10 @@ from ec2api.api import apirequest
 from ec2api.api import ec2utils
 from ec2api.api import faults
 from ec2api import context
+from ec2api.db import api as db_api
 from ec2api import exception
 from ec2api.i18n import _
+from ec2api import utils
 from ec2api import wsgi
 
 
@@ -53,6 +59,27 @@ ec2_opts = [
     cfg.IntOpt('ec2_timestamp_expiry',
                default=300,
                help='Time in seconds before ec2 timestamp expires'),
+    cfg.IntOpt('iam_cache_ttl',
+               default=60,
+               help='Time in seconds to keep a successful IAM validation '
+                    'result of a request. 0 disables the cache.'),
+    cfg.IntOpt('iam_cache_size',
+               default=10000,
+               help='Maximum number of IAM validation results kept in the '
+                    'cache of an API worker.'),
+    cfg.IntOpt('iam_pool_size',
+               default=10,
+               help='Maximum number of keep-alive connections to IAM '
+                    'kept by an API worker.'),
+    cfg.IntOpt('iam_max_retries',
+               default=1,
+               help='Number of retries of a failed connection to IAM.'),
+    cfg.FloatOpt('iam_connect_timeout',
+                 default=10.0,
+                 help='Timeout in seconds to connect to IAM.'),
+    cfg.FloatOpt('iam_read_timeout',
+                 default=60.0,
+                 help='Timeout in seconds to wait for an IAM response.'),
 ]
 
 CONF = cfg.CONF
@@ -68,6 +95,48 @@ EMPTY_SHA256_HASH = (
 PAYLOAD_BUFFER = 1024 * 1024
 
 
+_iam_session = None
+_iam_session_pid = None
+
+
+def _get_iam_session():
+    """Get HTTP session to IAM, which is shared by all requests of a worker.
+
+    The session is recreated after fork to not share sockets between
+    workers. Cookies are not kept to not leak them between users.
+    """
+    global _iam_session, _iam_session_pid
+    if _iam_session is None or _iam_session_pid != os.getpid():
+        session = requests.Session()
+        session.cookies.set_policy(
+            http_cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = requests_adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=CONF.iam_pool_size,
+            max_retries=CONF.iam_max_retries)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _iam_session = session
+        _iam_session_pid = os.getpid()
+    return _iam_session
+
+
+def _iam_request(request_id, url, **kwargs):
+    session = _get_iam_session()
+    pool = session.get_adapter(url).poolmanager.connection_from_url(url)
+    opened_connections = pool.num_connections
+    response = session.request(
+        'POST', url,
+        timeout=(CONF.iam_connect_timeout, CONF.iam_read_timeout),
+        **kwargs)
+    LOG.info('IAM request of %(request_id)s used %(connection)s connection',
+             {'request_id': request_id,
+              'connection': ('new'
+                             if pool.num_connections > opened_connections
+                             else 'reused')})
+    return response
+
+
 # Fault Wrapper around all EC2 requests #
 class FaultWrapper(wsgi.Middleware):
 
@@ -301,6 +370,29 @@ class EC2KeystoneAuth(wsgi.Middleware):
                           'DescribeFlowLogEnableAccounts' : None
                     }
 
+    def __init__(self, application):
+        super(EC2KeystoneAuth, self).__init__(application)
+        self._cache = utils.TTLCache(CONF.iam_cache_size, CONF.iam_cache_ttl)
+
+    def _get_cache_key(self, action, arm, auth_token, cred_dict,
+                       client_ip):
+        """Build the key of an IAM validation result.
+
+        The raw token is not kept in the key, its hash is used instead.
+        A signed request is identified by a digest of all credentials
+        which IAM verifies, so only an identical request hits the cache.
+        Client IP is a part of the key because it is sent to IAM and may
+        affect the decision.
+        """
+        if auth_token:
+            resource = arm[0].get('resource') if arm else ''
+            token_hash = hashlib.sha256(
+                encodeutils.safe_encode(auth_token)).hexdigest()
+            return (None, token_hash, action, resource, client_ip)
+        cred_hash = hashlib.sha256(encodeutils.safe_encode(
+            jsonutils.dumps(cred_dict, sort_keys=True))).hexdigest()
+        return (cred_hash, client_ip)
+
     def _get_signature(self, req):
         """Extract the signature from the request.
 
@@ -410,6 +502,7 @@ class EC2KeystoneAuth(wsgi.Middleware):
         headers = {'Content-Type': 'application/json'}
 
         auth_token = self._get_auth_token(req)
+        access = signature = None
 
         if None == auth_token:
             signature = self._get_signature(req)
@@ -453,16 +546,12 @@ class EC2KeystoneAuth(wsgi.Middleware):
         if '' != resourceId:
             arm[0]['resource'] = arm[0].get('resource') + resourceId
 
-        if auth_token:
-            data = {}
-
-            iam_validation_url = CONF.keystone_token_url
-
-            headers['X-Auth-Token'] = auth_token
-            data['action_resource_list'] = arm
+        client_ip = self._get_x_forwarded_for(req)
+        LOG.info(_('Client IP of request:{request_id} is {client_ip}'.\
+                    format(request_id=request_id, client_ip=client_ip)))
 
-            data = jsonutils.dumps(data)
-        else:
+        cred_dict = None
+        if not auth_token:
             host = req.host.split(':')[0]
 
             cred_dict = {
@@ -477,33 +566,50 @@ class EC2KeystoneAuth(wsgi.Middleware):
                           'params': params,
                        }
 
-            iam_validation_url = CONF.keystone_sig_url
+        cache_key = self._get_cache_key(action, arm, auth_token, cred_dict,
+                                        client_ip)
+        result = self._cache.get(cache_key)
+        if result is not None:
+            LOG.debug('IAM validation result for %(request_id)s is taken '
+                      'from cache: %(stats)s',
+                      {'request_id': request_id,
+                       'stats': self._cache.stats()})
+        else:
+            if auth_token:
+                data = {}
 
-            if "ec2" in iam_validation_url:
-                creds = {'ec2Credentials': cred_dict}
-            else:
-                creds = {'auth': {'OS-KSEC2:ec2Credentials': cred_dict}}
+                iam_validation_url = CONF.keystone_token_url
 
-            data = jsonutils.dumps(creds)
+                headers['X-Auth-Token'] = auth_token
+                data['action_resource_list'] = arm
 
-        client_ip = self._get_x_forwarded_for(req)
-        LOG.info(_('Client IP of request:{request_id} is {client_ip}'.\
-                    format(request_id=request_id, client_ip=client_ip)))
-        if client_ip:
-            headers['X-Forwarded-For'] = client_ip
-        verify = CONF.ssl_ca_file or not CONF.ssl_insecure
-        response = requests.request('POST', iam_validation_url, verify=verify,
-                                    data=data, headers=headers)
-        status_code = response.status_code
-        if status_code != 200:
-            LOG.error("Request headers - %s", str(headers))
-            LOG.error("Request params - %s", str(data))
-            LOG.error("Response headers - %s", str(response.headers))
-            LOG.error("Response content - %s", str(response._content))
-            msg = response.reason
-            return faults.ec2_error_response(request_id, "AuthFailure", msg,
-                                             status=status_code)
-        result = response.json()
+                data = jsonutils.dumps(data)
+            else:
+                iam_validation_url = CONF.keystone_sig_url
+
+                if "ec2" in iam_validation_url:
+                    creds = {'ec2Credentials': cred_dict}
+                else:
+                    creds = {'auth': {'OS-KSEC2:ec2Credentials': cred_dict}}
+
+                data = jsonutils.dumps(creds)
+
+            if client_ip:
+                headers['X-Forwarded-For'] = client_ip
+            verify = CONF.ssl_ca_file or not CONF.ssl_insecure
+            response = _iam_request(request_id, iam_validation_url,
+                                    verify=verify, data=data,
+                                    headers=headers)
+            status_code = response.status_code
+            if status_code != 200:
+                LOG.error("Request headers - %s", str(headers))
+                LOG.error("Request params - %s", str(data))
+                LOG.error("Response headers - %s", str(response.headers))
+                LOG.error("Response content - %s", str(response._content))
+                msg = response.reason
+                return faults.ec2_error_response(request_id, "AuthFailure",
+                                                 msg, status=status_code)
+            result = response.json()
 
         try:
             user_id = result['user_id']
@@ -527,6 +633,10 @@ class EC2KeystoneAuth(wsgi.Middleware):
             return faults.ec2_error_response(request_id, "AuthFailure", msg,
                                              status=400)
 
+        self._cache.set(cache_key, {'user_id': user_id,
+                                    'account_id': project_id,
+                                    'token_id': token_id})
+
         remote_address = req.remote_addr
         if CONF.use_forwarded_for:
             remote_address = req.headers.get('X-Forwarded-For',
@@ -674,6 +784,8 @@ class Executor(wsgi.Application):
     def __call__(self, req):
         context = req.environ['ec2api.context']
         api_request = req.environ['ec2.request']
+        context.item_cache = db_api.ItemCache()
+        context.read_from_replica = api_request.action.startswith('Describe')
         try:
             result = api_request.invoke(context)
         except Exception as ex:
@@ -24,35 +24,15 @@ from ec2api.api import clients
 from ec2api.api import common
 from ec2api.api import ec2utils
 from ec2api.api import internet_gateway as internet_gateway_api
+from ec2api.api import route_status
 from ec2api.db import api as db_api
 from ec2api import exception
 from ec2api.i18n import _
-import paramiko
-import re   
 
 CONF = cfg.CONF
-
-address_opts = [
-    cfg.StrOpt('router_address',
-               default='',
-               help='Address of router to get routes'),
-    cfg.StrOpt('router_user',
-               default='',
-               help='Username for router'),
-    cfg.StrOpt('router_cred',
-               default='',
-               help='Creds for Router'),
-]
-
-CONF = cfg.CONF
-CONF.register_opts(address_opts)
 LOG = logging.getLogger(__name__)
 
-RouterIP = CONF.router_address
-RouterUser = CONF.router_user
-RouterCred = CONF.router_cred 
-
-Status = ['active', 'pending']
+Status = [route_status.STATUS_ACTIVE, route_status.STATUS_PENDING]
 
 """Address related API implementation
 """
@@ -62,18 +42,15 @@ Validator = common.Validator
 
 
 
-def get_rt_ip_status(publicIp):
-    status = Status[1]
-    client = paramiko.SSHClient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    client.connect(RouterIP, username=RouterUser, password=RouterCred)
-    stdin, stdout, stderr = client.exec_command('show route '+publicIp +' detail'+ ' | grep \"Protocol next hop\"')
-    for line in stdout:
-        if re.match('\s+Protocol next hop: \d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}.*', line) !=None :
-            status = Status[0]
-            break
-    client.close()
-    return status
+def get_rt_ip_status(publicIp, force_refresh=False):
+    return route_status.get_status(publicIp, force_refresh=force_refresh)
+
+
+def _is_route_status_outdated(address):
+    if 'status' in address:
+        return (address['status'] == Status[1] or
+                'network_interface_id' not in address)
+    return 'network_interface_id' in address
 
 
     ### This function is called in order to remove any descrepancies
@@ -187,7 +164,43 @@ class AddressDescriber(common.UniversalDescriber):
                                self.db_instances_dict)
 
     def get_os_items(self):
-        return address_engine.get_os_floating_ips(self.context)
+        os_floating_ips = self._get_os_floating_ips()
+        # NOTE(ft): get route statuses of described addresses to be updated
+        # at once instead of one by one in auto_update_db
+        os_ids = set(os_fip['id'] for os_fip in os_floating_ips)
+        public_ips = self.get_filter_values('public-ip')
+        self.route_statuses = route_status.get_statuses(
+            set(item['public_ip'] for item in (self.items or [])
+                if (item.get('os_id') in os_ids and
+                    self._is_requested(item) and
+                    (public_ips is None or item['public_ip'] in public_ips) and
+                    _is_route_status_outdated(item))))
+        return os_floating_ips
+
+    def _is_requested(self, item):
+        return (not self.selective_describe or
+                item['id'] in self.ids or item['public_ip'] in self.names)
+
+    def _get_os_floating_ips(self):
+        os_ids = self.get_requested_os_ids()
+        if os_ids is not None:
+            return (address_engine.get_os_floating_ips(self.context,
+                                                       {'id': os_ids})
+                    if os_ids else [])
+        search_opts = {}
+        for filter_name, os_filter_name in (
+                ('public-ip', 'floating_ip_address'),
+                ('private-ip-address', 'fixed_ip_address')):
+            values = self.get_filter_values(filter_name)
+            if values is not None:
+                if not values:
+                    return []
+                search_opts[os_filter_name] = list(values)
+        return address_engine.get_os_floating_ips(self.context, search_opts)
+
+    def get_route_status(self, public_ip):
+        status = self.route_statuses.get(public_ip)
+        return status if status else get_rt_ip_status(public_ip)
 
     def auto_update_db(self, item, os_item):
         item = super(AddressDescriber, self).auto_update_db(item, os_item)
@@ -195,6 +208,8 @@ class AddressDescriber(common.UniversalDescriber):
                 (not os_item.get('port_id') or
                  os_item['fixed_ip_address'] != item['private_ip_address'])):
             _disassociate_address_item(self.context, item)
+            # NOTE(ft): the status is checked live at disassociation
+            self.route_statuses.pop(item['public_ip'], None)
             LOG.error("Auto update triggered disassociation - Local DB item : {} OS item : {}".format(str(item), str(os_item)))
         
         
@@ -206,7 +221,7 @@ class AddressDescriber(common.UniversalDescriber):
         if (item and 'status' in item) :
             if (item['status'] == Status[1] ) :
                 
-                item['status'] = get_rt_ip_status(item['public_ip'])
+                item['status'] = self.get_route_status(item['public_ip'])
                 
                 if('network_interface_id' in item) :                
                     #check for route
@@ -220,7 +235,7 @@ class AddressDescriber(common.UniversalDescriber):
                     
             elif ( item['status'] == Status[0] and 'network_interface_id' not in item ) :
                 #check for route
-                item['status'] = get_rt_ip_status(item['public_ip']) 
+                item['status'] = self.get_route_status(item['public_ip']) 
                 LOG.error('Address {} is disassociated and active. Current status is {}'.format(str(item), item['status']))
                 #pop if status is inactive
                 if item['status'] ==Status[1] :
@@ -229,7 +244,7 @@ class AddressDescriber(common.UniversalDescriber):
         #This is for migration whenever an old associated address is described.    
         if (item and 'network_interface_id' in item and 'status' not in item) :
             #check for routes
-            item['status'] = get_rt_ip_status(item['public_ip'])
+            item['status'] = self.get_route_status(item['public_ip'])
             LOG.error('Address {} do not have status. Adding status as {}'.format(str(item), item['status']))
             _update_status(self.context, item, item['status'])
             
@@ -325,7 +340,8 @@ def _disassociate_address_item(context, address):
     
     # This will help in migration of already associated IP
     # where there are ip's that are allocated but do not have status
-    address['status'] = get_rt_ip_status(address['public_ip'])
+    address['status'] = get_rt_ip_status(address['public_ip'],
+                                         force_refresh=True)
         
     db_api.update_item(context, address)
     return address['status']
@@ -482,7 +498,8 @@ class AddressEngineNeutron(object):
         else:
             #Check if disassociate is done or not.
             if 'status' in address :
-                if get_rt_ip_status(address['public_ip']) == Status[0] :
+                if get_rt_ip_status(address['public_ip'],
+                                    force_refresh=True) == Status[0] :
                     msg = _('address %(eipassoc_id)s is still disassociating. Retry in few seconds ')
                     msg = msg % { 'eipassoc_id': ec2utils.change_ec2_id_kind(
                                                 address['id'], 'eipassoc') }
@@ -549,10 +566,11 @@ class AddressEngineNeutron(object):
                 
                 return status
 
-    def get_os_floating_ips(self, context):
+    def get_os_floating_ips(self, context, search_opts=None):
         neutron = clients.neutron(context)
         return neutron.list_floatingips(
-            tenant_id=context.project_id)['floatingips']
+            tenant_id=context.project_id,
+            **(search_opts or {}))['floatingips']
 
     def get_os_ports(self, context):
         neutron = clients.neutron(context)
@@ -597,7 +615,9 @@ class AddressEngineNova(object):
             nova.servers.remove_floating_ip(os_instance_id, public_ip)
         return None
 
-    def get_os_floating_ips(self, context):
+    def get_os_floating_ips(self, context, search_opts=None):
+        # NOTE(ft): Nova can't filter floating IPs, so search_opts are
+        # ignored, and addresses are filtered by describer
         nova = clients.nova(context)
         return self.convert_ips_to_neutron_format(context,
                                                   nova.floating_ips.list())
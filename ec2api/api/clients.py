@@ -18,9 +18,11 @@ from novaclient import exceptions as nova_exception
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging as messaging
+import six
 
 from ec2api import context as ec2_context
 from ec2api.i18n import _, _LW
+from ec2api import utils
 
 logger = logging.getLogger(__name__)
 
@@ -31,13 +33,25 @@ ec2_opts = [
     cfg.StrOpt('nova_endpoint_url',
                default='http://127.0.0.1:8774/v2/',
                help='Nova EndPoint URL'),
+    cfg.IntOpt('os_client_cache_ttl',
+               default=300,
+               help='Time in seconds to reuse an OpenStack client created '
+                    'for an auth token. 0 disables the cache.'),
+    cfg.IntOpt('os_client_cache_size',
+               default=1000,
+               help='Maximum number of OpenStack clients kept by an API '
+                    'worker.'),
 ]
 
 CONF = cfg.CONF
 CONF.register_opts(ec2_opts)
 
+_unauthorized_exceptions = (nova_exception.Unauthorized,)
+
 try:
+    from neutronclient.common import exceptions as neutron_exception
     from neutronclient.v2_0 import client as neutronclient
+    _unauthorized_exceptions += (neutron_exception.Unauthorized,)
 except ImportError:
     neutronclient = None
     logger.info(_('neutronclient not available'))
@@ -59,7 +73,96 @@ _novaclient_vertion = '2.3'
 _nova_service_type = 'computev21'
 
 
+_clients_cache = None
+
+
+def _get_cached_client(service, endpoint, context, create_client):
+    """Get a client for the token from the cache or create a new one.
+
+    Clients are not cached for contexts without a token because such
+    a client can not be reused safely.
+    """
+    global _clients_cache
+    if not context.auth_token or CONF.os_client_cache_ttl <= 0:
+        return create_client()
+    if _clients_cache is None:
+        _clients_cache = utils.TTLCache(CONF.os_client_cache_size,
+                                        CONF.os_client_cache_ttl)
+    key = (service, endpoint, context.auth_token)
+    client = _clients_cache.get(key)
+    if client is None:
+        client = create_client()
+        _clients_cache.set(key, client, ttl=CONF.os_client_cache_ttl)
+    return client
+
+
+class _OSAdminClient(object):
+    """Client state shared by proxies of an admin client."""
+
+    def __init__(self, context, get_client):
+        self.context = context
+        self.get_client = get_client
+        self.client = get_client(context)
+
+    def reauthenticate(self):
+        ec2_context.invalidate_os_admin_auth(self.context.auth_token)
+        self.context = ec2_context.get_os_admin_context()
+        self.client = self.get_client(self.context)
+
+
+class _OSAdminClientProxy(object):
+    """Proxy of an admin client to retry a call rejected by OpenStack.
+
+    The cached admin token may be revoked before it expires. Then the call
+    is retried once with a new token.
+    """
+
+    _PLAIN_TYPES = six.string_types + six.integer_types + (
+        float, bool, type(None), dict, list, tuple)
+
+    def __init__(self, admin_client, path=()):
+        self._admin_client = admin_client
+        self._path = path
+
+    def _resolve(self):
+        obj = self._admin_client.client
+        for name in self._path:
+            obj = getattr(obj, name)
+        return obj
+
+    def __getattr__(self, name):
+        value = getattr(self._resolve(), name)
+        if isinstance(value, self._PLAIN_TYPES):
+            return value
+        return _OSAdminClientProxy(self._admin_client, self._path + (name,))
+
+    def __call__(self, *args, **kwargs):
+        try:
+            return self._resolve()(*args, **kwargs)
+        except _unauthorized_exceptions:
+            logger.warning(_LW('Admin token is rejected by OpenStack, '
+                               'retrying with a new one'))
+            self._admin_client.reauthenticate()
+            return self._resolve()(*args, **kwargs)
+
+
+def _get_client(context, get_client):
+    if ec2_context.is_os_admin_auth_token(context.auth_token):
+        return _OSAdminClientProxy(_OSAdminClient(context, get_client))
+    return get_client(context)
+
+
 def nova(context):
+    return _get_client(context, _get_nova)
+
+
+def _get_nova(context):
+    return _get_cached_client('compute',
+                              CONF.nova_endpoint_url + context.tenant,
+                              context, lambda: _nova(context))
+
+
+def _nova(context):
     args = {
         'auth_url': CONF.keystone_url,
         'auth_token': context.auth_token,
@@ -70,7 +173,10 @@ def nova(context):
         'api_key': None,
         'project_id': None,
         'insecure': CONF.ssl_insecure,
-        'cacert': CONF.ssl_ca_file
+        'cacert': CONF.ssl_ca_file,
+        # NOTE(ft): share keep-alive connections to the same endpoint
+        # between clients of different tokens
+        'connection_pool': True
     }
     global _novaclient_vertion, _nova_service_type
     #bypass_url = _url_for(context, service_type=_nova_service_type)
@@ -82,7 +188,7 @@ def nova(context):
                            "A lot of useful EC2 compliant instance properties "
                            "will be unavailable."))
         _nova_service_type = 'compute'
-        return nova(context)
+        return _nova(context)
     try:
         return novaclient.Client(_novaclient_vertion, bypass_url=bypass_url,
                                  **args)
@@ -95,13 +201,22 @@ def nova(context):
                            "A lot of useful EC2 compliant instance properties "
                            "will be unavailable."))
         _novaclient_vertion = '2'
-        return nova(context)
+        return _nova(context)
 
 
 def neutron(context):
     if neutronclient is None:
         return None
 
+    return _get_client(context, _get_neutron)
+
+
+def _get_neutron(context):
+    return _get_cached_client('network', CONF.neutron_endpoint_url,
+                              context, lambda: _neutron(context))
+
+
+def _neutron(context):
     args = {
         'auth_url': CONF.keystone_url,
         'service_type': 'network',
@@ -120,6 +235,12 @@ def glance(context):
     if glanceclient is None:
         return None
 
+    endpoint = _url_for(context, service_type='image')
+    return _get_cached_client('image', endpoint, context,
+                              lambda: _glance(context, endpoint))
+
+
+def _glance(context, endpoint):
     args = {
         'auth_url': CONF.keystone_url,
         'service_type': 'image',
@@ -128,14 +249,19 @@ def glance(context):
         'cacert': CONF.ssl_ca_file
     }
 
-    return glanceclient.Client(
-        "1", endpoint=_url_for(context, service_type='image'), **args)
+    return glanceclient.Client("1", endpoint=endpoint, **args)
 
 
 def cinder(context):
     if cinderclient is None:
         return nova(context, 'volume')
 
+    management_url = _url_for(context, service_type='volume')
+    return _get_cached_client('volume', management_url, context,
+                              lambda: _cinder(context, management_url))
+
+
+def _cinder(context, management_url):
     args = {
         'service_type': 'volume',
         'auth_url': CONF.keystone_url,
@@ -145,12 +271,11 @@ def cinder(context):
         'cacert': CONF.ssl_ca_file
     }
 
-    _cinder = cinderclient.Client('1', **args)
-    management_url = _url_for(context, service_type='volume')
-    _cinder.client.auth_token = context.auth_token
-    _cinder.client.management_url = management_url
+    client = cinderclient.Client('1', **args)
+    client.client.auth_token = context.auth_token
+    client.client.management_url = management_url
 
-    return _cinder
+    return client
 
 
 def keystone(context):
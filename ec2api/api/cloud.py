@@ -535,9 +535,7 @@ class CloudController(object):
             filter (list of filter dict): You can specify filters so that the
                 response includes information for only certain instances.
             max_results (int): The maximum number of items to return.
-                Not used now.
             next_token (str): The token for the next set of items to return.
-                Not used now.
 
         Returns:
             A list of reservations.
@@ -828,9 +826,7 @@ class CloudController(object):
             filter (list of filter dict): You can specify filters so that the
                 response includes information for only certain volumes.
             max_results (int): The maximum number of items to return.
-                Not used now.
             next_token (str): The token for the next set of items to return.
-                Not used now.
 
         Returns:
             A list of volumes.
@@ -1114,9 +1110,7 @@ class CloudController(object):
             filter (list of filter dict): You can specify filters so that the
                 response includes information for only certain tags.
             max_results (int): The maximum number of items to return.
-                Not used now.
             next_token (str): The token for the next set of items to return.
-                Not used now.
 
         Returns:
             A list of tags.
@@ -12,12 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
 import collections
 import fnmatch
 import inspect
+import json
+import re
 
+from eventlet import greenpool
 from oslo_config import cfg
 from oslo_log import log as logging
+import six
 
 from ec2api.api import ec2utils
 from ec2api.api import validator
@@ -30,6 +35,10 @@ ec2_opts = [
     cfg.BoolOpt('full_vpc_support',
                 default=True,
                 help='True if server supports Neutron for full VPC access'),
+    cfg.IntOpt('describe_os_items_concurrency',
+               default=10,
+               help='Maximum number of concurrent requests to OpenStack to '
+                    'get items requested by ids in a describe operation'),
 ]
 
 CONF = cfg.CONF
@@ -262,12 +271,104 @@ class Validator(object):
 VPC_KINDS = ['vpc', 'igw', 'subnet', 'eni', 'dopt', 'eipalloc', 'sg', 'rtb']
 
 
+def _encode_next_token(marker):
+    return base64.urlsafe_b64encode(json.dumps(marker))
+
+
+def _decode_next_token(next_token):
+    if next_token is None:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(str(next_token)))
+    except (TypeError, ValueError):
+        raise exception.InvalidParameterValue(
+            value=next_token, parameter='NextToken',
+            reason='invalid token')
+
+
+def _is_wildcard(pattern):
+    return any(c in str(pattern) for c in '*?[')
+
+
+def _compile_patterns(patterns):
+    """Compile fnmatch patterns to a function matching a value."""
+    exact_values = set()
+    regexes = []
+    for pattern in patterns:
+        pattern = str(pattern)
+        if _is_wildcard(pattern):
+            regexes.append(re.compile(fnmatch.translate(pattern)))
+        else:
+            exact_values.add(pattern)
+
+    def match(value):
+        value = str(value)
+        return (value in exact_values or
+                any(regex.match(value) for regex in regexes))
+    return match
+
+
+def _get_filter_accessor(filter_name):
+    """Get a function returning not None item values of a FILTER_MAP path.
+
+    A path is a key, a (key, subkey) tuple, or a [key, subpath] list
+    to get values from a list of subitems.
+    """
+    if isinstance(filter_name, list):
+        key = filter_name[0]
+        get_subvalues = _get_filter_accessor(filter_name[1])
+
+        def get_values(item):
+            values = []
+            for subitem in item.get(key, []):
+                values.extend(get_subvalues(subitem))
+            return values
+    elif isinstance(filter_name, tuple):
+        key, subkey = filter_name
+
+        def get_values(item):
+            value = item.get(key, {}).get(subkey)
+            return [value] if value is not None else []
+    else:
+        def get_values(item):
+            value = item.get(filter_name)
+            return [value] if value is not None else []
+    return get_values
+
+
+def get_os_items_by_ids(get_os_item, os_ids, not_found_exception):
+    """Get OpenStack items by ids concurrently.
+
+    Items which are not found are skipped.
+    """
+    def get_os_item_or_none(os_id):
+        try:
+            return get_os_item(os_id)
+        except not_found_exception:
+            return None
+
+    pool = greenpool.GreenPool(CONF.describe_os_items_concurrency)
+    return [os_item
+            for os_item in pool.imap(get_os_item_or_none, os_ids)
+            if os_item is not None]
+
+
 class UniversalDescriber(object):
     """Abstract Describer class for various Describe implementations."""
 
     KIND = ''
     FILTER_MAP = {}
 
+    # NOTE(ft): paging state of the last describe call. next_token is not
+    # None if there are more items to describe.
+    marker = None
+    max_results = None
+    next_token = None
+
+    # NOTE(ft): filters of the last describe call
+    filter = None
+    selective_describe = False
+
     def format(self, item=None, os_item=None):
         pass
 
@@ -280,6 +381,41 @@ class UniversalDescriber(object):
     def get_os_items(self):
         return []
 
+    def get_requested_os_ids(self):
+        """Get OpenStack ids of items requested by ids.
+
+        Use it in get_os_items to get requested OpenStack items only.
+        None is returned if all OpenStack items are required, i.e. the
+        describe is not selective, or items are requested by names too.
+        """
+        if not self.selective_describe or self.names:
+            return None
+        return [item['os_id'] for item in self.items
+                if item['id'] in self.ids and item.get('os_id')]
+
+    def get_filter_values(self, name):
+        """Get values of a filter to pass them to an OpenStack list query.
+
+        None is returned if the filter is not set or can not be passed to
+        OpenStack because of wildcards. Formatted items are checked by all
+        filters anyway, so OpenStack may return more items than required.
+        """
+        # NOTE(ft): items requested by ids or names must be got from
+        # OpenStack regardless of filters to not report them as not found
+        if self.selective_describe:
+            return None
+        values = None
+        for filter in self.filter or []:
+            if filter['name'] != name:
+                continue
+            if any(not isinstance(value, six.string_types) or
+                   _is_wildcard(value)
+                   for value in filter['value']):
+                return None
+            values = (set(filter['value']) if values is None else
+                      values & set(filter['value']))
+        return values
+
     def auto_update_db(self, item, os_item):
         if item is None and self.KIND not in VPC_KINDS:
             item = ec2utils.auto_create_db_item(self.context, self.KIND,
@@ -295,55 +431,123 @@ class UniversalDescriber(object):
     def delete_obsolete_item(self, item):
         db_api.delete_item(self.context, item['id'])
 
-    def is_filtering_value_found(self, filter_value, value):
-        if fnmatch.fnmatch(str(value), str(filter_value)):
-            return True
+    def get_paging_key(self, item, os_item):
+        return item['id'] if item else self.get_id(os_item)
+
+    def is_valid_marker(self, marker):
+        """Check a decoded NextToken has the shape of the paging keys."""
+        return isinstance(marker, six.string_types)
+
+    def init_paging(self, max_results, next_token):
+        if max_results is not None and max_results < 1:
+            raise exception.InvalidParameterValue(
+                value=max_results, parameter='MaxResults',
+                reason='must be a positive number')
+        self.max_results = max_results
+        self.marker = _decode_next_token(next_token)
+        if self.marker is not None and not self.is_valid_marker(self.marker):
+            raise exception.InvalidParameterValue(
+                value=next_token, parameter='NextToken',
+                reason='invalid token')
+        self.next_token = None
+        return max_results is not None or next_token is not None
+
+    def format_page(self, pairs, filter, paged_by_db=False):
+        """Format the next page of items ordered by their paging keys.
+
+        pairs is a list of (item, os_item) tuples. Items after the page
+        are not formatted. If paged_by_db is True, pairs are already
+        ordered and started after the marker by DB.
+        """
+        keyed_pairs = [(self.get_paging_key(item, os_item), item, os_item)
+                       for item, os_item in pairs]
+        if not paged_by_db:
+            keyed_pairs.sort(key=lambda pair: pair[0])
+        formatted_items = []
+        for index, (key, item, os_item) in enumerate(keyed_pairs):
+            if (not paged_by_db and self.marker is not None and
+                    key <= self.marker):
+                continue
+            formatted_item = (self.format(item, os_item)
+                              if os_item is not None else
+                              self.format(item))
+            self.post_format(formatted_item, item)
+            if (formatted_item and
+                    not self.filtered_out(formatted_item, filter)):
+                formatted_items.append(formatted_item)
+            if (self.max_results is not None and
+                    len(formatted_items) >= self.max_results):
+                if index < len(keyed_pairs) - 1:
+                    self.next_token = _encode_next_token(key)
+                break
+        return formatted_items
+
+    def compile_filter_value(self, filter_value):
+        """Compile a non-string filter value to a value matching function.
 
-    def filtered_out(self, item, filters):
-        if filters is None:
-            return False
+        Override it to support structured filter values.
+        """
+        return _compile_patterns([filter_value])
+
+    def compile_filters(self, filters):
+        """Compile filters to a list of (accessor, matcher) pairs.
+
+        The most selective filters go first to short-circuit filtering.
+        """
+        compiled_filters = []
         for filter in filters:
             filter_name = self.FILTER_MAP.get(filter['name'])
             if filter_name is None:
                 raise exception.InvalidParameterValue(
                     value=filter['name'], parameter='filter',
                     reason='invalid filter')
-            values = self.get_values_by_filter(filter_name, item)
-            if not values:
-                return True
-            filter_values = filter['value']
-            for filter_value in filter_values:
-                if any(self.is_filtering_value_found(filter_value, value)
-                       for value in values):
-                    break
-            else:
+            patterns = []
+            matchers = []
+            for filter_value in filter['value']:
+                if isinstance(filter_value, dict):
+                    matchers.append(self.compile_filter_value(filter_value))
+                else:
+                    patterns.append(filter_value)
+            if patterns:
+                matchers.append(_compile_patterns(patterns))
+            matcher = (matchers[0] if len(matchers) == 1 else
+                       lambda value, matchers=matchers: any(
+                           m(value) for m in matchers))
+            selectivity = (isinstance(filter_name, list),
+                           any(_is_wildcard(p) for p in patterns),
+                           len(filter['value']))
+            compiled_filters.append((selectivity,
+                                     _get_filter_accessor(filter_name),
+                                     matcher))
+        compiled_filters.sort(key=lambda f: f[0])
+        return [(accessor, value_matcher)
+                for _selectivity, accessor, value_matcher in compiled_filters]
+
+    def filtered_out(self, item, filters):
+        if filters is None:
+            return False
+        # NOTE(ft): filters are compiled once per describe call, since
+        # the same filters object is passed for all items
+        if getattr(self, '_filters', None) is not filters:
+            self._compiled_filters = self.compile_filters(filters)
+            self._filters = filters
+        for accessor, matcher in self._compiled_filters:
+            if not any(matcher(value) for value in accessor(item)):
                 return True
         return False
 
-    def get_values_by_filter(self, filter_name, item):
-        if isinstance(filter_name, list):
-            values = []
-            value_set = item.get(filter_name[0], [])
-            for value in value_set:
-                vals = self.get_values_by_filter(filter_name[1], value)
-                if vals:
-                    values += vals
-        else:
-            if isinstance(filter_name, tuple):
-                value = item.get(filter_name[0], {}).get(filter_name[1])
-            else:
-                value = item.get(filter_name)
-            values = [value] if value is not None else []
-        return values
-
-    def describe(self, context, ids=None, names=None, filter=None):
+    def describe(self, context, ids=None, names=None, filter=None,
+                 max_results=None, next_token=None):
         self.context = context
+        self.filter = filter
         self.selective_describe = ids is not None or names is not None
         self.ids = set(ids or [])
         self.names = set(names or [])
+        paging = self.init_paging(max_results, next_token)
         self.items = self.get_db_items()
         self.os_items = self.get_os_items()
         formatted_items = []
+        paired_items = []
 
         self.items_dict = {i['os_id']: i for i in (self.items or [])}
         paired_items_ids = set()
@@ -360,8 +564,13 @@ class UniversalDescriber(object):
             item = self.auto_update_db(item, os_item)
             if item:
                 paired_items_ids.add(item['id'])
-            formatted_item = self.format(item, os_item)
-            self.post_format(formatted_item, item)
+            if paging:
+                # NOTE(ft): items are formatted for the requested page only
+                paired_items.append((item, os_item))
+                formatted_item = None
+            else:
+                formatted_item = self.format(item, os_item)
+                self.post_format(formatted_item, item)
             if os_item_name in self.names:
                 self.names.remove(os_item_name)
             if item and item['id'] in self.ids:
@@ -380,6 +589,8 @@ class UniversalDescriber(object):
         if self.ids or self.names:
             params = {'id': next(iter(self.ids or self.names))}
             raise ec2utils.NOT_FOUND_EXCEPTION_MAP[self.KIND](**params)
+        if paging:
+            return self.format_page(paired_items, filter)
         return formatted_items
 
 
@@ -415,7 +626,8 @@ class TaggableItemsDescriber(UniversalDescriber):
             # errors in AWS docs)
             formatted_item['tagSet'] = formatted_tags
 
-    def describe(self, context, ids=None, names=None, filter=None):
+    def describe(self, context, ids=None, names=None, filter=None,
+                 max_results=None, next_token=None):
         if filter:
             for f in filter:
                 if f['name'].startswith('tag:'):
@@ -425,32 +637,41 @@ class TaggableItemsDescriber(UniversalDescriber):
                     f['value'] = [{'key': tag_key,
                                    'value': tag_values}]
         return super(TaggableItemsDescriber, self).describe(
-            context, ids, names, filter)
-
-    def is_filtering_value_found(self, filter_value, value):
-        if isinstance(filter_value, dict):
-            for tag_pair in value:
-                if (not isinstance(tag_pair, dict) or
-                        filter_value.get('key') != tag_pair.get('key')):
-                    continue
-                for filter_dict_value in filter_value.get('value'):
-                    if super(TaggableItemsDescriber,
-                             self).is_filtering_value_found(
-                                filter_dict_value,
-                                tag_pair.get('value')):
-                        return True
-            return False
-        return super(TaggableItemsDescriber,
-                     self).is_filtering_value_found(filter_value, value)
+            context, ids, names, filter, max_results, next_token)
+
+    def compile_filter_value(self, filter_value):
+        # NOTE(ft): tag:<key> filter value, which is matched to tagSet
+        key = filter_value.get('key')
+        match_value = _compile_patterns(filter_value.get('value'))
+
+        def match(tag_set):
+            return any(isinstance(tag_pair, dict) and
+                       tag_pair.get('key') == key and
+                       match_value(tag_pair.get('value'))
+                       for tag_pair in tag_set)
+        return match
 
 
 class NonOpenstackItemsDescriber(UniversalDescriber):
     """Describer class for non-Openstack items Describe implementations."""
 
-    def describe(self, context, ids=None, names=None, filter=None):
+    # NOTE(ft): set to True if get_db_items returns items of the requested
+    # page only, ordered by paging keys
+    PAGED_BY_DB = False
+
+    def get_paging_key(self, item, os_item=None):
+        return item['id']
+
+    def describe(self, context, ids=None, names=None, filter=None,
+                 max_results=None, next_token=None):
         self.context = context
+        self.filter = filter
         self.ids = ids
+        paging = self.init_paging(max_results, next_token)
         self.items = self.get_db_items()
+        if paging:
+            return self.format_page([(item, None) for item in self.items],
+                                    filter, self.PAGED_BY_DB)
         formatted_items = []
 
         for item in self.items:
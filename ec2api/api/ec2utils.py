@@ -285,8 +285,7 @@ def get_db_item_by_os_id(context, kind, os_id, items_by_os_id=None,
         if item:
             return item
     else:
-        item = next((i for i in db_api.get_items(context, kind)
-                     if i['os_id'] == os_id), None)
+        item = db_api.get_item_by_os_id(context, kind, os_id)
     if not item:
         item = auto_create_db_item(context, kind, os_id, project_id=project_id,
                                    **extension_kwargs)
@@ -294,7 +294,7 @@ class ImageDescriber(common.TaggableItemsDescriber):
                 raise exception.InvalidAMIIDNotFound(id=next(iter(missed_ids)))
         self.snapshot_ids = dict(
             (s['os_id'], s['id'])
-            for s in db_api.get_items(self.context, 'snap'))
+            for s in db_api.get_project_items_ids(self.context, 'snap'))
         self.local_images_os_ids = set(i['os_id'] for i in local_images)
         self.ids_dict = {}
         return images
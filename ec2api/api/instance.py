@@ -325,11 +325,13 @@ class InstanceDescriber(common.TaggableItemsDescriber):
         self.ec2_network_interfaces = (
             instance_engine.get_ec2_network_interfaces(
                 self.context, self.ids))
-        self.volumes = {v['os_id']: v
-                        for v in db_api.get_items(self.context, 'vol')}
+        self.volumes = {
+            v['os_id']: v
+            for v in db_api.get_project_items_ids(self.context, 'vol')}
         self.image_ids = {i['os_id']: i['id']
                           for i in itertools.chain(
-                              db_api.get_items(self.context, 'ami'),
+                              db_api.get_project_items_ids(self.context,
+                                                           'ami'),
                               db_api.get_public_items(self.context, 'ami'))}
         return instances
 
@@ -337,15 +339,53 @@ class InstanceDescriber(common.TaggableItemsDescriber):
         self.os_volumes = _get_os_volumes(self.context)
         self.os_flavors = _get_os_flavors(self.context)
         nova = clients.nova(ec2_context.get_os_admin_context())
-        if self.ids == 1 and len(self.items) == 1:
-            try:
-                return [nova.servers.get(self.items[0]['os_id'])]
-            except nova_exception.NotFound:
-                return []
+        os_ids = self.get_requested_os_ids()
+        if os_ids is not None:
+            return common.get_os_items_by_ids(nova.servers.get, os_ids,
+                                              nova_exception.NotFound)
         else:
-            return nova.servers.list(
-                search_opts={'all_tenants': True,
-                             'project_id': self.context.project_id})
+            search_opts = self.get_os_servers_search_opts()
+            if search_opts is None:
+                return []
+            search_opts.update({'all_tenants': True,
+                                'project_id': self.context.project_id})
+            return nova.servers.list(search_opts=search_opts)
+
+    def get_os_servers_search_opts(self):
+        """Translate filters to Nova server filters.
+
+        Nova takes one value of a filter only, so filters with several
+        values are not translated. None is returned if no server can
+        match the filters.
+        """
+        search_opts = {}
+        zones = self.get_filter_values('availability-zone')
+        if zones is not None:
+            if not zones:
+                return None
+            if len(zones) == 1:
+                search_opts['availability_zone'] = next(iter(zones))
+        state_names = self.get_filter_values('instance-state-name')
+        if state_names is not None:
+            if not state_names:
+                return None
+            state_descriptions = _STATE_DESCRIPTION_MAP.items()
+            vm_states = set(vm_state
+                            for vm_state, name in state_descriptions
+                            if name in state_names)
+            # NOTE(ft): vm_states which are not in the map are described
+            # as they are (see _cloud_state_description)
+            described_names = set(_STATE_DESCRIPTION_MAP.values())
+            vm_states.update(name for name in state_names
+                             if (name not in _STATE_DESCRIPTION_MAP and
+                                 name not in described_names))
+            # NOTE(ft): None vm_state and wiped out instances can't be got
+            # by a vm_state filter
+            if len(vm_states) == 1:
+                vm_state = next(iter(vm_states))
+                if vm_state not in (None, vm_states_WIPED_OUT):
+                    search_opts['vm_state'] = vm_state
+        return search_opts
 
     def auto_update_db(self, instance, os_instance):
         if not instance:
@@ -382,7 +422,8 @@ class ReservationDescriber(common.NonOpenstackItemsDescriber):
     def get_db_items(self):
         return self.reservations
 
-    def describe(self, context, ids=None, names=None, filter=None):
+    def describe(self, context, ids=None, names=None, filter=None,
+                 max_results=None, next_token=None):
         reservation_filters = []
         instance_filters = []
         for f in filter or []:
@@ -400,7 +441,8 @@ class ReservationDescriber(common.NonOpenstackItemsDescriber):
         try:
             instance_describer = InstanceDescriber()
             formatted_instances = instance_describer.describe(
-                    context, ids=ids, filter=instance_filters)
+                    context, ids=ids, filter=instance_filters,
+                    max_results=max_results, next_token=next_token)
         except exception.InvalidInstanceIDNotFound:
             _remove_instances(context, instance_describer.obsolete_instances)
             raise
@@ -413,15 +455,23 @@ class ReservationDescriber(common.NonOpenstackItemsDescriber):
         self.suitable_instances = set(i['instanceId']
                                       for i in formatted_instances)
 
-        return super(ReservationDescriber, self).describe(
+        formatted_reservations = super(ReservationDescriber, self).describe(
                 context, filter=reservation_filters)
+        # NOTE(ft): instances are paged, reservations are built from the page
+        self.next_token = instance_describer.next_token
+        return formatted_reservations
 
 
 def describe_instances(context, instance_id=None, filter=None,
                        max_results=None, next_token=None):
-    formatted_reservations = ReservationDescriber().describe(
-            context, ids=instance_id, filter=filter)
-    return {'reservationSet': formatted_reservations}
+    describer = ReservationDescriber()
+    formatted_reservations = describer.describe(
+            context, ids=instance_id, filter=filter,
+            max_results=max_results, next_token=next_token)
+    result = {'reservationSet': formatted_reservations}
+    if describer.next_token:
+        result['nextToken'] = describer.next_token
+    return result
 
 
 def reboot_instances(context, instance_id):
@@ -1080,8 +1130,9 @@ class InstanceEngineNeutron(object):
         return [sg['os_id'] for sg in security_groups]
 
     def get_ec2_classic_os_network(self, context, neutron):
-        os_subnet_ids = [eni['os_id']
-                         for eni in db_api.get_items(context, 'subnet')]
+        os_subnet_ids = [
+            eni['os_id']
+            for eni in db_api.get_project_items_ids(context, 'subnet')]
         if os_subnet_ids:
             os_subnets = neutron.list_subnets(id=os_subnet_ids,
                 fields=['network_id'], tenant_id=context.project_id)['subnets']
@@ -236,8 +236,41 @@ class NetworkInterfaceDescriber(common.TaggableItemsDescriber):
                         address['networkInterfaceId']].append(address)
         self.security_groups = (
             security_group_api._format_security_groups_ids_names(self.context))
+        os_ids = self.get_requested_os_ids()
+        if os_ids is not None:
+            search_opts = {'id': os_ids} if os_ids else None
+        else:
+            search_opts = self.get_os_ports_search_opts()
+        if search_opts is None:
+            return []
         neutron = clients.neutron(self.context)
-        return neutron.list_ports(tenant_id=self.context.project_id)['ports']
+        return neutron.list_ports(tenant_id=self.context.project_id,
+                                  **search_opts)['ports']
+
+    def get_os_ports_search_opts(self):
+        """Translate filters to Neutron port filters.
+
+        None is returned if no port can match the filters.
+        """
+        fixed_ips = []
+        subnet_ids = self.get_filter_values('subnet-id')
+        vpc_ids = self.get_filter_values('vpc-id')
+        if subnet_ids is not None or vpc_ids is not None:
+            subnets = [subnet
+                       for subnet in db_api.get_items(self.context, 'subnet')
+                       if ((subnet_ids is None or
+                            subnet['id'] in subnet_ids) and
+                           (vpc_ids is None or subnet['vpc_id'] in vpc_ids))]
+            if not subnets:
+                return None
+            fixed_ips.extend('subnet_id=%s' % subnet['os_id']
+                             for subnet in subnets)
+        ip_addresses = self.get_filter_values('private-ip-address')
+        if ip_addresses is not None:
+            if not ip_addresses:
+                return None
+            fixed_ips.extend('ip_address=%s' % ip for ip in ip_addresses)
+        return {'fixed_ips': fixed_ips} if fixed_ips else {}
 
     def get_name(self, os_item):
         return ''
@@ -0,0 +1,333 @@
+# Copyright 2014
+# The Cloudscaling Group, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Status of elastic IP routes on the edge router.
+
+Routes of the floating IP range are fetched from the router by one command
+and are kept in memory as an index of destinations to their protocol next
+hops. Status of an address is answered from the index, unless a live check
+of the address is requested. If the floating IP range is not configured,
+each address is checked on the router separately.
+"""
+
+import collections
+import os
+import re
+import socket
+import time
+
+from eventlet import semaphore
+import netaddr
+from oslo_concurrency import lockutils
+from oslo_config import cfg
+from oslo_log import log as logging
+import paramiko
+
+from ec2api.i18n import _LE
+from ec2api.openstack.common import loopingcall
+
+
+router_opts = [
+    cfg.StrOpt('router_address',
+               default='',
+               help='Address of router to get routes'),
+    cfg.StrOpt('router_user',
+               default='',
+               help='Username for router'),
+    cfg.StrOpt('router_cred',
+               default='',
+               help='Creds for Router'),
+    cfg.StrOpt('router_floating_ip_range',
+               default='',
+               help='CIDR of floating IPs routed by router. Only routes '
+                    'of the range are got from router. If not set, each '
+                    'address is checked on router separately.'),
+    cfg.StrOpt('router_routes_command',
+               default='show route %(floating_ip_range)s orlonger detail | '
+                       'grep -E "^[0-9]|Protocol next hop"',
+               help='Router command to get routes of floating IP range '
+                    'with their protocol next hops'),
+    cfg.IntOpt('router_routes_poll_interval',
+               default=0,
+               help='Interval in seconds to get routes from router in '
+                    'background. Each API worker process runs its own '
+                    'poller. 0 disables background polling.'),
+    cfg.IntOpt('router_routes_max_age',
+               default=60,
+               help='Maximum age in seconds of known routes to get status '
+                    'of an address. Older routes are got from router '
+                    'synchronously.'),
+    cfg.IntOpt('router_ssh_pool_size',
+               default=2,
+               help='Maximum number of concurrent SSH sessions to router '
+                    'opened by an API worker.'),
+    cfg.IntOpt('router_ssh_keepalive',
+               default=30,
+               help='Interval in seconds to send keepalive packets to '
+                    'router over idle SSH sessions.'),
+    cfg.FloatOpt('router_command_timeout',
+                 default=10.0,
+                 help='Timeout in seconds to connect to router and to run '
+                      'a command on it.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(router_opts)
+LOG = logging.getLogger(__name__)
+
+
+STATUS_ACTIVE = 'active'
+STATUS_PENDING = 'pending'
+
+_ROUTE_COMMAND = 'show route %s detail | grep "Protocol next hop"'
+
+_destination_regex = re.compile(
+    '^(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}(/\d{1,2})?)(\s|$)')
+_next_hop_regex = re.compile(
+    '\s+Protocol next hop: (\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}).*')
+
+
+class RouterConnectionPool(object):
+    """Pool of long-lived authenticated SSH sessions to router.
+
+    Not more than size commands are run concurrently, other callers wait
+    for a free session. A broken idle session is reopened transparently.
+    """
+
+    def __init__(self, size):
+        self._semaphore = semaphore.Semaphore(size)
+        self._idle_clients = []
+
+    def _connect(self):
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(CONF.router_address, username=CONF.router_user,
+                       password=CONF.router_cred,
+                       timeout=CONF.router_command_timeout)
+        client.get_transport().set_keepalive(CONF.router_ssh_keepalive)
+        return client
+
+    def _get_idle_client(self):
+        while self._idle_clients:
+            client = self._idle_clients.pop()
+            transport = client.get_transport()
+            if transport is not None and transport.is_active():
+                return client
+            client.close()
+        return None
+
+    def _run(self, client, command):
+        try:
+            stdin, stdout, stderr = client.exec_command(
+                command, timeout=CONF.router_command_timeout)
+            return stdout.readlines()
+        except Exception:
+            client.close()
+            raise
+
+    def run_command(self, command):
+        with self._semaphore:
+            client = self._get_idle_client()
+            if client is not None:
+                try:
+                    lines = self._run(client, command)
+                except socket.timeout:
+                    raise
+                except (paramiko.SSHException, socket.error, EOFError):
+                    # NOTE(ft): router could drop the session silently
+                    LOG.debug('Idle SSH session to router is broken, '
+                              'reconnecting')
+                    client = None
+            if client is None:
+                client = self._connect()
+                lines = self._run(client, command)
+            self._idle_clients.append(client)
+            return lines
+
+
+_pool = None
+_pool_pid = None
+
+
+def _get_connection_pool():
+    global _pool, _pool_pid
+    # NOTE(ft): sessions are not shared between workers after fork
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = RouterConnectionPool(CONF.router_ssh_pool_size)
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def _run_router_command(command):
+    return _get_connection_pool().run_command(command)
+
+
+def parse_routes(lines):
+    """Parse router output to a dict of destinations to protocol next hops.
+
+    Destinations without protocol next hop are mapped to None.
+    """
+    routes = {}
+    destination = None
+    for line in lines:
+        match = _destination_regex.match(line)
+        if match:
+            destination = netaddr.IPNetwork(match.group(1))
+            routes.setdefault(destination, None)
+            continue
+        match = _next_hop_regex.match(line)
+        if match and destination is not None and not routes[destination]:
+            routes[destination] = match.group(1)
+    return routes
+
+
+class RouteIndex(object):
+    """In-memory index of router destinations to protocol next hops.
+
+    Lookups use the longest prefix match, as the router does for a
+    'show route <ip>' command. Results of live checks of addresses
+    override the index until a newer route table is loaded.
+    """
+
+    def __init__(self):
+        self.updated_at = None
+        self._prefixes = []
+        self._routes = {}
+        self._checked = {}
+
+    def update(self, routes, updated_at):
+        routes_by_prefix = collections.defaultdict(dict)
+        for network, next_hop in routes.items():
+            routes_by_prefix[network.prefixlen][int(network.network)] = (
+                next_hop)
+        self._prefixes = sorted(routes_by_prefix, reverse=True)
+        self._routes = dict(routes_by_prefix)
+        self._checked = dict((ip, checked)
+                             for ip, checked in self._checked.items()
+                             if checked[0] > updated_at)
+        self.updated_at = updated_at
+
+    def set_checked_status(self, ip, status, checked_at):
+        self._checked[ip] = (checked_at, status)
+
+    def get_next_hop(self, ip):
+        ip_value = int(netaddr.IPAddress(ip))
+        for prefixlen in self._prefixes:
+            mask = (0xffffffff << (32 - prefixlen)) & 0xffffffff
+            network = ip_value & mask
+            routes = self._routes[prefixlen]
+            if network in routes:
+                return routes[network]
+        return None
+
+    def get_status(self, ip):
+        checked = self._checked.get(ip)
+        if checked:
+            return checked[1]
+        return STATUS_ACTIVE if self.get_next_hop(ip) else STATUS_PENDING
+
+
+_index = RouteIndex()
+_poller = None
+_poller_pid = None
+
+
+def _is_index_fresh():
+    return (_index.updated_at is not None and
+            time.time() - _index.updated_at < CONF.router_routes_max_age)
+
+
+def _get_routes_command():
+    # NOTE(ft): validate the range to not inject it into router command
+    floating_ip_range = str(netaddr.IPNetwork(CONF.router_floating_ip_range))
+    return CONF.router_routes_command % {
+        'floating_ip_range': floating_ip_range}
+
+
+@lockutils.synchronized('ec2api-router-routes')
+def refresh_routes(not_older_than=None):
+    """Load the route table from router to the index.
+
+    Loading is skipped if the index was updated after not_older_than
+    while waiting for another green thread doing the same.
+    """
+    if (not_older_than is not None and _index.updated_at is not None and
+            _index.updated_at > not_older_than):
+        return
+    started_at = time.time()
+    routes = parse_routes(_run_router_command(_get_routes_command()))
+    _index.update(routes, started_at)
+    LOG.debug('%(count)s routes are got from router in %(time).3f sec',
+              {'count': len(routes), 'time': time.time() - started_at})
+
+
+def _poll_routes():
+    try:
+        refresh_routes()
+    except Exception:
+        LOG.exception(_LE('Failed to get routes from router %s'),
+                      CONF.router_address)
+
+
+def _ensure_poller():
+    global _poller, _poller_pid
+    if CONF.router_routes_poll_interval <= 0:
+        return
+    # NOTE(ft): the poller is started in each worker after fork
+    if _poller is None or _poller_pid != os.getpid():
+        _poller = loopingcall.FixedIntervalLoopingCall(_poll_routes)
+        _poller.start(CONF.router_routes_poll_interval,
+                      initial_delay=CONF.router_routes_poll_interval)
+        _poller_pid = os.getpid()
+
+
+def check_status(public_ip):
+    """Check status of an address on router right now."""
+    # NOTE(ft): validate the address to not inject it into router command
+    public_ip = str(netaddr.IPAddress(public_ip))
+    checked_at = time.time()
+    status = STATUS_PENDING
+    for line in _run_router_command(_ROUTE_COMMAND % public_ip):
+        if _next_hop_regex.match(line):
+            status = STATUS_ACTIVE
+            break
+    _index.set_checked_status(public_ip, status, checked_at)
+    return status
+
+
+def get_statuses(public_ips):
+    """Get statuses of several addresses by one read of the index.
+
+    The index is kept not older than router_routes_max_age. Without
+    router_floating_ip_range addresses are checked on router one by one.
+    """
+    if not public_ips:
+        return {}
+    if not CONF.router_floating_ip_range:
+        return dict((ip, check_status(ip)) for ip in public_ips)
+    _ensure_poller()
+    if not _is_index_fresh():
+        refresh_routes(time.time() - CONF.router_routes_max_age)
+    return dict((ip, _index.get_status(ip)) for ip in public_ips)
+
+
+def get_status(public_ip, force_refresh=False):
+    """Get status of an address.
+
+    Pass force_refresh to check the address on router right now instead
+    of using the index.
+    """
+    if force_refresh:
+        return check_status(public_ip)
+    return get_statuses([public_ip])[public_ip]
@@ -486,6 +486,10 @@ def _update_subnet_host_routes(context, subnet, route_table, cleaner=None,
     os_subnet = neutron.show_subnet(subnet['os_id'])['subnet']
     gateway_ip = str(netaddr.IPAddress(
         netaddr.IPNetwork(os_subnet['cidr']).first + 1))
+    if add_vpc_route and _is_vpc_wide_subnet(route_table, os_subnet):
+        # NOTE(ft): VPC route is not set to a subnet with the VPC range to
+        # not rely on describes to remove it
+        add_vpc_route = False
     if add_vpc_route == False:
         host_routes = _get_subnet_host_routes(context, route_table, gateway_ip,
                                               router_objects, False)
@@ -502,6 +506,14 @@ def _update_subnet_host_routes(context, subnet, route_table, cleaner=None,
                            route_table, None, None, None, None, False, True)
 
 
+def _is_vpc_wide_subnet(route_table, os_subnet):
+    prefixlen = netaddr.IPNetwork(os_subnet['cidr']).prefixlen
+    return any(route.get('gateway_id', '') is None and
+               netaddr.IPNetwork(route['destination_cidr_block']).prefixlen ==
+               prefixlen
+               for route in route_table['routes'])
+
+
 def _get_router_objects(context, route_table):
     return dict((route['gateway_id'],
                  db_api.get_item_by_id(context, route['gateway_id']))
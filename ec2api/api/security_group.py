@@ -15,6 +15,7 @@
 
 import copy
 
+from eventlet import greenpool
 try:
     from neutronclient.common import exceptions as neutron_exception
 except ImportError:
@@ -32,7 +33,15 @@ from ec2api import exception
 from ec2api.i18n import _
 
 
+security_group_opts = [
+    cfg.IntOpt('security_group_rules_concurrency',
+               default=10,
+               help='Maximum number of concurrent requests to OpenStack to '
+                    'delete security group rules'),
+]
+
 CONF = cfg.CONF
+CONF.register_opts(security_group_opts)
 LOG = logging.getLogger(__name__)
 
 
@@ -66,9 +75,11 @@ def create_security_group(context, group_name, group_description, vpc_id=None):
 #  removed check if group_name!= vpc_id as it allowing creation of multiple default sg
     if vpc_id:
         if vpc_id == group_name:
-            security_groups = describe_security_groups( context, filter=[{'name': 'vpc-id', 'value': [vpc_id]}, {'name': 'group-name', 'value': ["default"]}])['securityGroupInfo']
-        else: 
-           security_groups = describe_security_groups( context, filter=[{'name': 'vpc-id', 'value': [vpc_id]}, {'name': 'group-name', 'value': [group_name]}])['securityGroupInfo'] 
+            security_groups = _get_vpc_security_groups_by_name(
+                context, vpc_id, 'default')
+        else:
+            security_groups = _get_vpc_security_groups_by_name(
+                context, vpc_id, group_name)
         if group_name == vpc_id and len(security_groups)>0:
             raise exception.InvalidGroupReserved(name=group_name)
         if security_groups:
@@ -136,11 +147,15 @@ class SecurityGroupDescriber(common.TaggableItemsDescriber):
 
     def format(self, item=None, os_item=None):
         return _format_security_group(item, os_item,
-                                      self.all_db_items, self.os_items)
+                                      self.db_items_by_os_id,
+                                      self.os_items_by_id)
 
     def get_os_items(self):
         if self.all_db_items is None:
             self.all_db_items = db_api.get_items(self.context, 'sg')
+        # NOTE(ft): index groups once to format rules in constant time
+        self.db_items_by_os_id = dict((g['os_id'], g)
+                                      for g in self.all_db_items)
         os_groups = security_group_engine.get_os_groups(self.context)
         #if self.check_and_repair_default_groups(os_groups, self.all_db_items):
         #    self.all_db_items = db_api.get_items(self.context, 'sg')
@@ -149,7 +164,8 @@ class SecurityGroupDescriber(common.TaggableItemsDescriber):
         for os_group in os_groups:
             os_group['name'] = _translate_group_name(self.context,
                                                      os_group,
-                                                     self.all_db_items)
+                                                     self.db_items_by_os_id)
+        self.os_items_by_id = dict((g['id'], g) for g in os_groups)
         return os_groups
 
     def check_and_repair_default_groups(self, os_groups, db_groups):
@@ -198,7 +214,8 @@ def _authorize_security_group(context, group_id, group_name,
     for rule_body in rules_bodies:
         if rule_body['protocol'] == "any":
             rule_body['protocol'] = None
-        security_group_engine.authorize_security_group(context, rule_body)
+    security_group_engine.authorize_security_group_rules(context,
+                                                         rules_bodies)
     return True
 
 
@@ -272,26 +289,23 @@ def _build_rules(context, group_id, group_name, ip_permissions, direction):
         if to_port != -1:
             os_security_group_rule_body['port_range_max'] = rule['to_port']
 
-        # TODO(Alex) AWS protocol claims support of multiple groups and cidrs,
-        # however, neutron doesn't support it at the moment.
-        # It's possible in the future to convert list values incoming from
-        # REST API into several neutron rules and squeeze them back into one
-        # for describing.
-        # For now only 1 value is supported for either.
-        if rule.get('groups'):
-            os_security_group_rule_body['remote_group_id'] = (
-                security_group_engine.get_group_os_id(
-                    context,
-                    rule['groups'][0].get('group_id'),
-                    rule['groups'][0].get('group_name')))
-        elif rule.get('ip_ranges'):
-            os_security_group_rule_body['remote_ip_prefix'] = (
-                rule['ip_ranges'][0]['cidr_ip'])
-            validator.validate_cidr_with_ipv6(
-                os_security_group_rule_body['remote_ip_prefix'], 'cidr_ip')
-        else:
+        # NOTE(Alex): AWS permission can contain several groups and cidrs,
+        # however, neutron rule has only one remote. So the permission is
+        # converted into a neutron rule per remote, and the rules are
+        # squeezed back into one permission for describing.
+        remotes = []
+        for group in rule.get('groups') or []:
+            remotes.append(
+                {'remote_group_id': security_group_engine.get_group_os_id(
+                    context, group.get('group_id'), group.get('group_name'))})
+        for ip_range in rule.get('ip_ranges') or []:
+            validator.validate_cidr_with_ipv6(ip_range['cidr_ip'], 'cidr_ip')
+            remotes.append({'remote_ip_prefix': ip_range['cidr_ip']})
+        if not remotes:
             raise exception.MissingParameter(param='source group or cidr')
-        os_security_group_rule_bodies.append(os_security_group_rule_body)
+        for remote in remotes:
+            os_security_group_rule_bodies.append(
+                dict(os_security_group_rule_body, **remote))
     return os_security_group_rule_bodies
 
 
@@ -306,20 +320,17 @@ def revoke_security_group_egress(context, group_id, ip_permissions=None):
                                   ip_permissions, 'egress')
 
 
-def _are_identical_rules(rule1, rule2):
+_RULE_KEY_FIELDS = ('direction', 'ethertype', 'protocol', 'port_range_min',
+                    'port_range_max', 'remote_ip_prefix', 'remote_group_id')
+_RULE_BODY_FIELDS = _RULE_KEY_FIELDS + ('security_group_id',)
 
-    def significant_values(rule):
-        dict = {}
-        for key, value in rule.items():
-            if (value is not None and value != -1 and
-                    value != '0.0.0.0/0' and
-                    key not in ['id', 'tenant_id', 'security_group_id']):
-                dict[key] = str(value)
-        return dict
 
-    r1 = significant_values(rule1)
-    r2 = significant_values(rule2)
-    return r1 == r2
+def _get_rule_key(rule):
+    # NOTE(ft): rules are identical if they have the same significant values.
+    # Default values are omitted in rule bodies, so they are insignificant.
+    return frozenset((field, str(rule[field]))
+                     for field in _RULE_KEY_FIELDS
+                     if rule.get(field) not in (None, -1, '0.0.0.0/0'))
 
 
 def _revoke_security_group(context, group_id, group_name, ip_permissions,
@@ -331,41 +342,91 @@ def _revoke_security_group(context, group_id, group_name, ip_permissions,
     os_rules = security_group_engine.get_os_group_rules(
         context, rules_bodies[0]['security_group_id'])
 
-    os_rules_to_delete = []
-    for rule_body in rules_bodies:
-        for os_rule in os_rules:
-            if _are_identical_rules(rule_body, os_rule):
-                os_rules_to_delete.append(os_rule['id'])
+    os_rules_by_key = {}
+    for os_rule in os_rules:
+        os_rules_by_key.setdefault(_get_rule_key(os_rule), []).append(os_rule)
+    os_rules_to_delete = dict((os_rule['id'], os_rule)
+                              for rule_body in rules_bodies
+                              for os_rule in os_rules_by_key.get(
+                                  _get_rule_key(rule_body), []))
 
     if not os_rules_to_delete:
         raise exception.InvalidPermissionNotFound(sg_id=group_id)
-    for os_rule_id in os_rules_to_delete:
-        security_group_engine.delete_os_group_rule(context, os_rule_id)
+    _delete_os_group_rules(context, os_rules_to_delete.values())
     return True
 
 
-def _translate_group_name(context, os_group, db_groups):
+def _delete_os_group_rules(context, os_rules):
+    def delete_os_rule(os_rule):
+        try:
+            security_group_engine.delete_os_group_rule(context, os_rule['id'])
+            return os_rule, None
+        except Exception as ex:
+            return os_rule, ex
+
+    pool = greenpool.GreenPool(CONF.security_group_rules_concurrency)
+    with common.OnCrashCleaner() as cleaner:
+        error = None
+        for os_rule, ex in pool.imap(delete_os_rule, os_rules):
+            if ex is None:
+                rule_body = dict((field, os_rule[field])
+                                 for field in _RULE_BODY_FIELDS
+                                 if os_rule.get(field) is not None)
+                cleaner.addCleanup(
+                    security_group_engine.authorize_security_group_rules,
+                    context, [rule_body])
+            elif error is None:
+                error = ex
+        # NOTE(ft): restore deleted rules if some of them are not deleted
+        # to keep the group unchanged
+        if error is not None:
+            raise error
+
+
+def _translate_group_name(context, os_group, db_groups_by_os_id):
     # NOTE(Alex): This function translates VPC default group names
     # from vpc id 'vpc-xxxxxxxx' format to 'default'. It's supposed
     # to be called right after getting security groups from OpenStack
     # in order to avoid problems with incoming 'default' name value
     # in all of the subsequent handling (filtering, using in parameters...)
-    if (os_group['name'].startswith('vpc-') and db_groups and
-            next((g for g in db_groups
-                  if g['os_id'] == os_group['id'] and g['vpc_id'] == os_group['name']), None)):
-        return 'default'
+    if os_group['name'].startswith('vpc-'):
+        db_group = db_groups_by_os_id.get(os_group['id'])
+        if db_group and db_group['vpc_id'] == os_group['name']:
+            return 'default'
     return os_group['name']
 
 
+def _get_vpc_security_groups_by_name(context, vpc_id, group_name):
+    # NOTE(ft): this is a lightweight version of describing groups filtered
+    # by vpc-id and group-name to check names uniqueness in a VPC. Only groups
+    # of the VPC are indexed, and only OpenStack groups which names can be
+    # translated to the requested one are got without their rules.
+    db_groups_by_os_id = dict((g['os_id'], g)
+                              for g in db_api.get_items(context, 'sg')
+                              if g['vpc_id'] == vpc_id)
+    if not db_groups_by_os_id:
+        return []
+    os_names = [group_name]
+    if group_name == 'default':
+        os_names.append(vpc_id)
+    os_groups = security_group_engine.get_os_groups_by_names(context,
+                                                             os_names)
+    return [db_groups_by_os_id[os_group['id']]
+            for os_group in os_groups
+            if (os_group['id'] in db_groups_by_os_id and
+                _translate_group_name(context, os_group,
+                                      db_groups_by_os_id) == group_name)]
+
+
 def _format_security_groups_ids_names(context):
     neutron = clients.neutron(context)
     os_security_groups = neutron.list_security_groups(
         tenant_id=context.project_id)['security_groups']
-    security_groups = db_api.get_items(context, 'sg')
+    security_groups = dict((g['os_id'], g)
+                           for g in db_api.get_items(context, 'sg'))
     ec2_security_groups = {}
     for os_security_group in os_security_groups:
-        security_group = next((g for g in security_groups
-                               if g['os_id'] == os_security_group['id']), None)
+        security_group = security_groups.get(os_security_group['id'])
         if security_group is None:
             continue
         ec2_security_groups[os_security_group['id']] = (
@@ -377,7 +438,7 @@ def _format_security_groups_ids_names(context):
 
 
 def _format_security_group(security_group, os_security_group,
-                           security_groups, os_security_groups):
+                           security_groups_by_os_id, os_security_groups_by_id):
     ec2_security_group = {}
     if security_group is not None:
         ec2_security_group['groupId'] = security_group['id']
@@ -401,15 +462,13 @@ def _format_security_group(security_group, os_security_group,
         remote_group_id = os_rule['remote_group_id']
         if remote_group_id is not None:
             ec2_remote_group = {}
-            db_remote_group = next((g for g in security_groups
-                                    if g['os_id'] == remote_group_id), None)
+            db_remote_group = security_groups_by_os_id.get(remote_group_id)
             if db_remote_group is not None:
                 ec2_remote_group['groupId'] = db_remote_group['id']
             else:
                 # TODO(Alex) Log absence of remote_group
                 pass
-            os_remote_group = next((g for g in os_security_groups
-                                    if g['id'] == remote_group_id), None)
+            os_remote_group = os_security_groups_by_id.get(remote_group_id)
             if os_remote_group is not None:
                 ec2_remote_group['groupName'] = os_remote_group['name']
                 ec2_remote_group['userId'] = os_remote_group['tenant_id']
@@ -433,12 +492,38 @@ def _format_security_group(security_group, os_security_group,
             else:
                 ingress_permissions.append(ec2_rule)
 
-    ec2_security_group['ipPermissions'] = ingress_permissions
+    ec2_security_group['ipPermissions'] = _squeeze_ec2_permissions(
+        ingress_permissions)
     if security_group is not None:
-        ec2_security_group['ipPermissionsEgress'] = egress_permissions
+        ec2_security_group['ipPermissionsEgress'] = _squeeze_ec2_permissions(
+            egress_permissions)
     return ec2_security_group
 
 
+def _squeeze_ec2_permissions(ec2_rules):
+    # NOTE(ft): join remotes of rules with the same protocol and ports into
+    # one permission. Rules without remotes allow any source, so they are
+    # not joined with others.
+    ec2_permissions = []
+    ec2_permissions_by_key = {}
+    for ec2_rule in ec2_rules:
+        if 'groups' not in ec2_rule and 'ipRanges' not in ec2_rule:
+            ec2_permissions.append(ec2_rule)
+            continue
+        key = (ec2_rule['ipProtocol'], ec2_rule['fromPort'],
+               ec2_rule['toPort'])
+        ec2_permission = ec2_permissions_by_key.get(key)
+        if ec2_permission is None:
+            ec2_permissions_by_key[key] = ec2_rule
+            ec2_permissions.append(ec2_rule)
+            continue
+        for remotes_key in ('groups', 'ipRanges'):
+            if remotes_key in ec2_rule:
+                ec2_permission.setdefault(remotes_key, []).extend(
+                    ec2_rule[remotes_key])
+    return ec2_permissions
+
+
 class SecurityGroupEngineNeutron(object):
 
     def delete_group(self, context, group_name=None, group_id=None,
@@ -450,11 +535,12 @@ class SecurityGroupEngineNeutron(object):
                                                           group_id)
         security_group = ec2utils.get_db_item(context, group_id)
         vpc_id = security_group['vpc_id']
-        security_groups = describe_security_groups(context,filter=[{'name': 'vpc-id','value': [vpc_id]},{'name': 'group-id','value': [group_id]}])['securityGroupInfo'] 
-        if security_groups[0]['groupName'] == 'default' and vpc_id != None :
-            security_groups = describe_security_groups(context,filter=[{'name': 'vpc-id','value': [vpc_id]},{'name': 'group-name','value': ["default"]}])['securityGroupInfo']  
-            if len(security_groups) > 1: 
-                delete_default=True
+        if vpc_id is not None:
+            default_groups = _get_vpc_security_groups_by_name(
+                context, vpc_id, 'default')
+            if (len(default_groups) > 1 and
+                    any(g['id'] == group_id for g in default_groups)):
+                delete_default = True
         try:
             if not delete_default:
                 os_security_group = neutron.show_security_group(
@@ -482,6 +568,12 @@ class SecurityGroupEngineNeutron(object):
         return neutron.list_security_groups(
             tenant_id=context.project_id)['security_groups']
 
+    def get_os_groups_by_names(self, context, names):
+        neutron = clients.neutron(context)
+        return neutron.list_security_groups(
+            tenant_id=context.project_id, name=names,
+            fields=['id', 'name'])['security_groups']
+
     def authorize_security_group(self, context, rule_body):
         neutron = clients.neutron(context)
         try:
@@ -491,6 +583,21 @@ class SecurityGroupEngineNeutron(object):
             raise exception.RulesPerSecurityGroupLimitExceeded()
         except neutron_exception.Conflict as ex:
             raise exception.InvalidPermissionDuplicate()
+        return os_security_group_rule
+
+    def authorize_security_group_rules(self, context, rule_bodies):
+        if len(rule_bodies) == 1:
+            return [self.authorize_security_group(context, rule_bodies[0])]
+        # NOTE(ft): Neutron creates bulk of rules atomically, so there is
+        # nothing to rollback if a rule of the bulk fails
+        neutron = clients.neutron(context)
+        try:
+            return neutron.create_security_group_rule(
+                {'security_group_rules': rule_bodies})['security_group_rules']
+        except neutron_exception.OverQuotaClient:
+            raise exception.RulesPerSecurityGroupLimitExceeded()
+        except neutron_exception.Conflict as ex:
+            raise exception.InvalidPermissionDuplicate()
 
     def get_os_group_rules(self, context, os_id):
         neutron = clients.neutron(context)
@@ -529,6 +636,13 @@ class SecurityGroupEngineNova(object):
                         context,
                         nova.security_groups.list())
 
+    def get_os_groups_by_names(self, context, names):
+        nova = clients.nova(context)
+        return [{'id': nova_group.id,
+                 'name': nova_group.name}
+                for nova_group in nova.security_groups.list()
+                if nova_group.name in names]
+
     def authorize_security_group(self, context, rule_body):
         nova = clients.nova(context)
         try:
@@ -543,6 +657,17 @@ class SecurityGroupEngineNova(object):
             raise exception.InvalidPermissionDuplicate()
         except nova_exception.OverLimit:
             raise exception.RulesPerSecurityGroupLimitExceeded()
+        return os_security_group_rule
+
+    def authorize_security_group_rules(self, context, rule_bodies):
+        nova = clients.nova(context)
+        os_rules = []
+        with common.OnCrashCleaner() as cleaner:
+            for rule_body in rule_bodies:
+                os_rule = self.authorize_security_group(context, rule_body)
+                cleaner.addCleanup(nova.security_group_rules.delete, os_rule)
+                os_rules.append(os_rule)
+        return os_rules
 
     def get_os_group_rules(self, context, os_id):
         nova = clients.nova(context)
@@ -13,6 +13,8 @@
 # limitations under the License.
 
 
+import collections
+
 import netaddr
 from neutronclient.common import exceptions as neutron_exception
 from oslo_config import cfg
@@ -156,9 +158,10 @@ def create_subnet(context, vpc_id, cidr_block,
                                {'network': {'name': subnet['id']}})
         neutron.update_subnet(os_subnet['id'],
                               {'subnet': {'name': subnet['id']}})
-    os_ports = neutron.list_ports(tenant_id=context.project_id)['ports']
+    os_ports = neutron.list_ports(tenant_id=context.project_id,
+                                  network_id=os_network['id'])['ports']
     return {'subnet': _format_subnet(context, subnet, os_subnet,
-                                     os_network, os_ports)}
+                                     os_network, _get_ports_usage(os_ports))}
 
 
 def delete_subnet(context, subnet_id):
@@ -216,25 +219,56 @@ class SubnetDescriber(common.TaggableItemsDescriber):
     def format(self, subnet, os_subnet):
         if not subnet:
             return None
-        os_network = next((n for n in self.os_networks
-                           if n['id'] == os_subnet['network_id']),
-                          None)
+        os_network = self.os_networks.get(os_subnet['network_id'])
         if not os_network:
             self.delete_obsolete_item(subnet)
             return None
         return _format_subnet(self.context, subnet, os_subnet, os_network,
-                              self.os_ports)
+                              self.ports_usage)
 
     def get_name(self, os_item):
         return ''
 
     def get_os_items(self):
         neutron = clients.neutron(self.context)
-        self.os_networks = neutron.list_networks(
-            tenant_id=self.context.project_id)['networks']
-        self.os_ports = neutron.list_ports(
-            tenant_id=self.context.project_id)['ports']
-        return neutron.list_subnets()['subnets']
+        os_subnet_ids = self.get_requested_os_ids()
+        if os_subnet_ids is None:
+            subnet_ids = self.get_filter_values('subnet-id')
+            vpc_ids = self.get_filter_values('vpc-id')
+            if subnet_ids is None and vpc_ids is None:
+                self.set_os_networks_and_ports(
+                    neutron.list_networks(
+                        tenant_id=self.context.project_id)['networks'],
+                    neutron.list_ports(
+                        tenant_id=self.context.project_id)['ports'])
+                return neutron.list_subnets(
+                    tenant_id=self.context.project_id)['subnets']
+            # NOTE(ft): subnets without DB items are not described anyway
+            os_subnet_ids = [subnet['os_id'] for subnet in self.items
+                             if ((subnet_ids is None or
+                                  subnet['id'] in subnet_ids) and
+                                 (vpc_ids is None or
+                                  subnet['vpc_id'] in vpc_ids))]
+
+        # NOTE(ft): get only requested OS subnets with their networks and
+        # ports
+        os_subnets = (neutron.list_subnets(id=os_subnet_ids)['subnets']
+                      if os_subnet_ids else [])
+        os_network_ids = list(set(os_subnet['network_id']
+                                  for os_subnet in os_subnets))
+        if not os_network_ids:
+            self.set_os_networks_and_ports([], [])
+            return os_subnets
+        self.set_os_networks_and_ports(
+            neutron.list_networks(id=os_network_ids)['networks'],
+            neutron.list_ports(tenant_id=self.context.project_id,
+                               network_id=os_network_ids)['ports'])
+        return os_subnets
+
+    def set_os_networks_and_ports(self, os_networks, os_ports):
+        self.os_networks = dict((os_network['id'], os_network)
+                                for os_network in os_networks)
+        self.ports_usage = _get_ports_usage(os_ports)
 
 
 def describe_subnets(context, subnet_id=None, filter=None):
@@ -243,7 +277,56 @@ def describe_subnets(context, subnet_id=None, filter=None):
     return {'subnetSet': formatted_subnets}
 
 
-def _format_subnet(context, subnet, os_subnet, os_network, os_ports):
+def reconcile_host_routes(context):
+    """Remove VPC route from host routes of subnets with the VPC range.
+
+    Subnets which were created before the VPC route was excluded for them
+    can still have it. Subnets without host_routes_reconciled flag are
+    dirty, and they are reconciled and flagged to be processed once.
+    Returns the number of updated subnets.
+    """
+    neutron = clients.neutron(context)
+    vpcs = dict((vpc['id'], vpc) for vpc in db_api.get_items(context, 'vpc'))
+    updated_count = 0
+    for subnet in db_api.get_items(context, 'subnet'):
+        vpc = vpcs.get(subnet['vpc_id'])
+        if subnet.get('host_routes_reconciled') or not vpc:
+            continue
+        try:
+            os_subnet = neutron.show_subnet(subnet['os_id'])['subnet']
+        except neutron_exception.NotFound:
+            continue
+        if (netaddr.IPNetwork(os_subnet['cidr']).prefixlen ==
+                netaddr.IPNetwork(vpc['cidr_block']).prefixlen):
+            route_table = db_api.get_item_by_id(
+                context, subnet.get('route_table_id') or vpc['route_table_id'])
+            route_table_api._update_subnet_host_routes(
+                context, subnet, route_table, neutron=neutron,
+                add_vpc_route=False)
+            updated_count += 1
+        subnet['host_routes_reconciled'] = True
+        db_api.update_item(context, subnet)
+    return updated_count
+
+
+def _get_ports_usage(os_ports):
+    """Get IP usage of subnets by ports.
+
+    Returns a dict of OS subnet ids to numbers of IPs used by the ports
+    and flags if a DHCP port of the subnet is found.
+    """
+    ports_usage = collections.defaultdict(lambda: [0, False])
+    for port in os_ports:
+        is_dhcp_port = port['device_owner'] == 'network:dhcp'
+        for fixed_ip in port.get('fixed_ips', []):
+            usage = ports_usage[fixed_ip['subnet_id']]
+            usage[0] += 1
+            if is_dhcp_port:
+                usage[1] = True
+    return ports_usage
+
+
+def _format_subnet(context, subnet, os_subnet, os_network, ports_usage):
     status_map = {'ACTIVE': 'available',
                   'BUILD': 'pending',
                   'DOWN': 'available',
@@ -251,28 +334,9 @@ def _format_subnet(context, subnet, os_subnet, os_network, os_ports):
     cidr_range = int(os_subnet['cidr'].split('/')[1])
     # NOTE(Alex) First and last IP addresses are system ones.
     ip_count = pow(2, 32 - cidr_range) - 2
-    # TODO(Alex): Probably performance-killer. Will have to optimize.
-    dhcp_port_accounted = False
-
-    # Get the vpc cidr and the route table object to trigger subnet host route cleanup
-    vpc_id = subnet["vpc_id"]
-    vpc = ec2utils.get_db_item(context, vpc_id)
-    vpc_cidr = vpc["cidr_block"]
-    vpc_cidr_range = int(vpc_cidr.split('/')[1])
-
-    # If subnet range is same as VPC range trigger cleanup
-    if cidr_range == vpc_cidr_range:
-        with common.OnCrashCleaner() as cleaner:
-            main_route_table = db_api.get_item_by_id(context, vpc['route_table_id'])
-            route_table_api._update_subnet_host_routes(context, subnet, main_route_table, cleaner, None, None, None, True, False)
-            LOG.error("Triggering host route cleanup for subnet id - {} within vpc {}".format(subnet['id'], vpc_id))
-
-    for port in os_ports:
-        for fixed_ip in port.get('fixed_ips', []):
-            if fixed_ip['subnet_id'] == os_subnet['id']:
-                ip_count -= 1
-                if port['device_owner'] == 'network:dhcp':
-                    dhcp_port_accounted = True
+    used_ip_count, dhcp_port_accounted = ports_usage.get(os_subnet['id'],
+                                                         (0, False))
+    ip_count -= used_ip_count
     if not dhcp_port_accounted:
         ip_count -= 1
     return {
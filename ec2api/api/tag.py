@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import six
+
 from ec2api.api import common
 from ec2api.api import ec2utils
 from ec2api.db import api as db_api
@@ -92,17 +94,37 @@ class TagDescriber(common.NonOpenstackItemsDescriber):
                   'resource-id': 'resourceId',
                   'resource-type': 'resourceType',
                   'value': 'value'}
+    PAGED_BY_DB = True
 
     def get_db_items(self):
-        return db_api.get_tags(self.context)
+        if self.marker is None and self.max_results is None:
+            return db_api.get_tags(self.context)
+        # NOTE(ft): get one extra tag to know if there are more tags
+        limit = (self.max_results + 1
+                 if self.max_results is not None and not self.filter else
+                 None)
+        return db_api.get_tags(self.context, marker=self.marker, limit=limit)
+
+    def get_paging_key(self, item, os_item=None):
+        return [item['item_id'], item['key']]
+
+    def is_valid_marker(self, marker):
+        return (isinstance(marker, list) and len(marker) == 2 and
+                all(isinstance(v, six.string_types) for v in marker))
 
     def format(self, item):
         return _format_tag(item)
 
 
 def describe_tags(context, filter=None, max_results=None, next_token=None):
-    formatted_tags = TagDescriber().describe(context, filter=filter)
-    return {'tagSet': formatted_tags}
+    describer = TagDescriber()
+    formatted_tags = describer.describe(context, filter=filter,
+                                        max_results=max_results,
+                                        next_token=next_token)
+    result = {'tagSet': formatted_tags}
+    if describer.next_token:
+        result['nextToken'] = describer.next_token
+    return result
 
 
 def _format_tag(tag):
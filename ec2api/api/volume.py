@@ -85,8 +85,8 @@ def detach_volume(context, volume_id, instance_id=None, device=None,
     nova = clients.nova(context)
     nova.volumes.delete_server_volume(os_instance_id, os_volume.id)
     os_volume.get()
-    instance_id = next((i['id'] for i in db_api.get_items(context, 'i')
-                        if i['os_id'] == os_instance_id), None)
+    instance = db_api.get_item_by_os_id(context, 'i', os_instance_id)
+    instance_id = instance['id'] if instance else None
     return _format_attachment(context, volume, os_volume,
                               instance_id=instance_id)
 
@@ -126,10 +126,12 @@ class VolumeDescriber(common.TaggableItemsDescriber):
                               self.instances, self.snapshots)
 
     def get_db_items(self):
-        self.instances = {i['os_id']: i
-                          for i in db_api.get_items(self.context, 'i')}
-        self.snapshots = {s['os_id']: s
-                          for s in db_api.get_items(self.context, 'snap')}
+        self.instances = {
+            i['os_id']: i
+            for i in db_api.get_project_items_ids(self.context, 'i')}
+        self.snapshots = {
+            s['os_id']: s
+            for s in db_api.get_project_items_ids(self.context, 'snap')}
         return super(VolumeDescriber, self).get_db_items()
 
     def get_os_items(self):
@@ -141,9 +143,14 @@ class VolumeDescriber(common.TaggableItemsDescriber):
 
 def describe_volumes(context, volume_id=None, filter=None,
                      max_results=None, next_token=None):
-    formatted_volumes = VolumeDescriber().describe(
-        context, ids=volume_id, filter=filter)
-    return {'volumeSet': formatted_volumes}
+    describer = VolumeDescriber()
+    formatted_volumes = describer.describe(
+        context, ids=volume_id, filter=filter,
+        max_results=max_results, next_token=next_token)
+    result = {'volumeSet': formatted_volumes}
+    if describer.next_token:
+        result['nextToken'] = describer.next_token
+    return result
 
 
 def _format_volume(context, volume, os_volume, instances={},
@@ -23,7 +23,10 @@ import sys
 from oslo_config import cfg
 from oslo_log import log
 
+from ec2api.api import subnet as subnet_api
 from ec2api import config
+from ec2api import context as ec2_context
+from ec2api.db import api as db_api
 from ec2api.db import migration
 from ec2api.i18n import _
 
@@ -44,6 +47,26 @@ def do_db_sync():
     migration.db_sync(CONF.command.version)
 
 
+def do_reconcile_subnet_host_routes():
+    """Remove VPC route from host routes of subnets with the VPC range.
+
+    It's done once for each subnet of all projects.
+    """
+    admin_context = ec2_context.get_os_admin_context()
+    project_ids = set(item['project_id']
+                      for item in db_api.get_items_project_ids(admin_context,
+                                                               'subnet'))
+    for project_id in sorted(project_ids):
+        project_context = ec2_context.RequestContext(
+            admin_context.user_id, project_id,
+            auth_token=admin_context.auth_token,
+            service_catalog=admin_context.service_catalog,
+            is_os_admin=True, overwrite=False)
+        updated_count = subnet_api.reconcile_host_routes(project_context)
+        print(_('Project %(project_id)s: %(count)s subnets are updated') %
+              {'project_id': project_id, 'count': updated_count})
+
+
 def add_command_parsers(subparsers):
     parser = subparsers.add_parser('db_version')
     parser.set_defaults(func=do_db_version)
@@ -53,6 +76,9 @@ def add_command_parsers(subparsers):
     parser.add_argument('version', nargs='?')
     parser.add_argument('current_version', nargs='?')
 
+    parser = subparsers.add_parser('reconcile_subnet_host_routes')
+    parser.set_defaults(func=do_reconcile_subnet_host_routes)
+
 
 command_opt = cfg.SubCommandOpt('command',
                                 title='Commands',
@@ -19,6 +19,7 @@ import uuid
 from keystoneclient import client as keystone_client
 from keystoneclient.v2_0 import client as keystone_client_v2
 from keystoneclient.v3 import client as keystone_client_v3
+from oslo_concurrency import lockutils
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import timeutils
@@ -37,6 +38,10 @@ ec2_opts = [
                secret=True),
     cfg.StrOpt('admin_tenant_name',
                help=_("Admin tenant name")),
+    cfg.IntOpt('admin_token_refresh_margin',
+               default=300,
+               help=_("Time in seconds before expiration of the admin "
+                      "token to get a new one")),
     # TODO(andrey-mp): keystone v3 allows to pass domain_name
     # or domain_id to auth. This code should support this feature.
 ]
@@ -102,6 +107,12 @@ class RequestContext(object):
         # TODO(ft): call policy.check_is_admin if is_admin is None
         self.is_os_admin = is_os_admin
         self.api_version = api_version
+        # NOTE(ft): ec2api.db.api.ItemCache instance to read DB items once
+        # per request. It's set for API requests only.
+        self.item_cache = None
+        # NOTE(ft): route DB reads to the slave connection. It's set for
+        # Describe* API requests and is reset by DB writes.
+        self.read_from_replica = False
         if overwrite or not hasattr(local.store, 'context'):
             self.update_store()
 
@@ -173,12 +184,23 @@ def get_keystone_client_class():
     return _keystone_client_class
 
 
-def get_os_admin_context():
-    """Create a context to interact with OpenStack as an administrator."""
-    if (getattr(local.store, 'context', None) and
-            local.store.context.is_os_admin):
-        return local.store.context
-    # TODO(ft): make an authentification token reusable
+_admin_auth = None
+_admin_auth_stats = {'reused': 0, 'refreshed': 0}
+
+
+def _is_admin_auth_valid(admin_auth):
+    return (admin_auth is not None and
+            not admin_auth['auth_ref'].will_expire_soon(
+                stale_duration=CONF.admin_token_refresh_margin))
+
+
+@lockutils.synchronized('ec2api-os-admin-auth')
+def _refresh_admin_auth():
+    global _admin_auth
+    # NOTE(ft): another green thread could get a new token while this one
+    # was waiting for the lock
+    if _is_admin_auth_valid(_admin_auth):
+        return _admin_auth
     keystone_client_class = get_keystone_client_class()
     keystone = keystone_client_class(
         username=CONF.admin_user,
@@ -189,12 +211,56 @@ def get_os_admin_context():
         insecure=CONF.ssl_insecure,
         cacert=CONF.ssl_ca_file
     )
-    service_catalog = keystone.service_catalog.get_data()
+    _admin_auth = {'user_id': keystone.auth_user_id,
+                   'project_id': keystone.auth_tenant_id,
+                   'auth_token': keystone.auth_token,
+                   'auth_ref': keystone.auth_ref,
+                   'service_catalog': keystone.service_catalog.get_data()}
+    _admin_auth_stats['refreshed'] += 1
+    LOG.info(_('Admin token is refreshed: %s') % get_admin_auth_stats())
+    return _admin_auth
+
+
+def is_os_admin_auth_token(auth_token):
+    """Check if the token is the cached admin token."""
+    admin_auth = _admin_auth
+    return (auth_token is not None and admin_auth is not None and
+            admin_auth['auth_token'] == auth_token)
+
+
+@lockutils.synchronized('ec2api-os-admin-auth')
+def invalidate_os_admin_auth(auth_token):
+    """Drop the cached admin auth if OpenStack rejects its token."""
+    global _admin_auth
+    if _admin_auth is not None and _admin_auth['auth_token'] == auth_token:
+        _admin_auth = None
+        LOG.warning(_('Admin token is rejected, it will be refreshed'))
+    store_context = getattr(local.store, 'context', None)
+    if (store_context and store_context.is_os_admin and
+            store_context.auth_token == auth_token):
+        del local.store.context
+
+
+def get_admin_auth_stats():
+    """Get counters of reused and refreshed admin tokens."""
+    return dict(_admin_auth_stats)
+
+
+def get_os_admin_context():
+    """Create a context to interact with OpenStack as an administrator."""
+    if (getattr(local.store, 'context', None) and
+            local.store.context.is_os_admin):
+        return local.store.context
+    admin_auth = _admin_auth
+    if _is_admin_auth_valid(admin_auth):
+        _admin_auth_stats['reused'] += 1
+    else:
+        admin_auth = _refresh_admin_auth()
     return RequestContext(
-            keystone.auth_user_id,
-            keystone.auth_tenant_id,
-            auth_token=keystone.auth_token,
-            service_catalog=service_catalog,
+            admin_auth['user_id'],
+            admin_auth['project_id'],
+            auth_token=admin_auth['auth_token'],
+            service_catalog=admin_auth['service_catalog'],
             is_os_admin=True)
 
 
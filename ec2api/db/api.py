@@ -27,6 +27,8 @@ functions from ec2api.db namespace, not the ec2api.db.api namespace.
 
 """
 
+import copy
+
 from eventlet import tpool
 from oslo_config import cfg
 from oslo_db import api as db_api
@@ -79,42 +81,170 @@ IMPL = EC2DBAPI()
 LOG = logging.getLogger(__name__)
 
 
+class ItemCache(object):
+    """Request-scoped identity map of DB items.
+
+    Set it to item_cache attribute of a request context to read items,
+    which are already read or written by the request, from memory.
+    Items are copied in and out to isolate the cache from modifications
+    of returned items by callers.
+    """
+
+    def __init__(self):
+        self._items = {}
+        self._kinds = {}
+
+    def get_item(self, project_id, item_id):
+        item = self._items.get((project_id, item_id))
+        return copy.deepcopy(item)
+
+    def get_items(self, project_id, kind):
+        item_ids = self._kinds.get((project_id, kind))
+        if item_ids is None:
+            return None
+        return [self.get_item(project_id, item_id) for item_id in item_ids]
+
+    def set_item(self, project_id, item):
+        self._items[(project_id, item['id'])] = copy.deepcopy(item)
+
+    def set_items(self, project_id, kind, items):
+        for item in items:
+            self.set_item(project_id, item)
+        self._kinds[(project_id, kind)] = [item['id'] for item in items]
+
+    def invalidate(self, kind, item_id=None):
+        # NOTE(ft): an item can be written for a project other than
+        # the context's one, so item lists are invalidated for all projects
+        for key in [key for key in self._kinds if key[1] == kind]:
+            del self._kinds[key]
+        if item_id is not None:
+            for key in [key for key in self._items if key[1] == item_id]:
+                del self._items[key]
+
+
+def _get_item_cache(context):
+    cache = getattr(context, 'item_cache', None)
+    # NOTE(ft): a context, which is not a RequestContext (e.g. a mock),
+    # can give anything else
+    return cache if isinstance(cache, ItemCache) else None
+
+
+def _get_item_kind(item_id):
+    return item_id.split('-')[0]
+
+
+def read_from_primary(context):
+    """Read from the primary DB for the rest of the request.
+
+    Reads of Describe* requests are routed to the slave DB connection if
+    it's configured. Call this before reading data which could be just
+    written and is not replicated yet. It's called implicitly by writes of
+    the request.
+    """
+    if getattr(context, 'read_from_replica', False):
+        context.read_from_replica = False
+
+
 def add_item(context, kind, data, project_id=None):
-    return IMPL.add_item(context, kind, data, project_id=project_id)
+    read_from_primary(context)
+    item = IMPL.add_item(context, kind, data, project_id=project_id)
+    cache = _get_item_cache(context)
+    if cache:
+        cache.invalidate(kind, item['id'])
+    return item
 
 
 def add_item_id(context, kind, os_id, project_id=None):
-    return IMPL.add_item_id(context, kind, os_id, project_id=project_id)
+    read_from_primary(context)
+    item_id = IMPL.add_item_id(context, kind, os_id, project_id=project_id)
+    cache = _get_item_cache(context)
+    if cache:
+        cache.invalidate(kind, item_id)
+    return item_id
 
 
 def update_item(context, item):
+    read_from_primary(context)
     IMPL.update_item(context, item)
+    cache = _get_item_cache(context)
+    if cache:
+        cache.set_item(context.project_id, item)
 
 
 def delete_item(context, item_id):
-    IMPL.delete_item(context, item_id)
+    read_from_primary(context)
+    deleted_count = IMPL.delete_item(context, item_id)
+    cache = _get_item_cache(context)
+    if cache:
+        cache.invalidate(_get_item_kind(item_id), item_id)
+    return deleted_count
 
 
 def restore_item(context, kind, data):
-    return IMPL.restore_item(context, kind, data)
+    read_from_primary(context)
+    item = IMPL.restore_item(context, kind, data)
+    cache = _get_item_cache(context)
+    if cache:
+        cache.invalidate(kind, item['id'])
+        cache.set_item(context.project_id, item)
+    return item
 
 
 def get_items(context, kind):
-    return IMPL.get_items(context, kind)
+    cache = _get_item_cache(context)
+    if not cache:
+        return IMPL.get_items(context, kind)
+    items = cache.get_items(context.project_id, kind)
+    if items is None:
+        items = IMPL.get_items(context, kind)
+        cache.set_items(context.project_id, kind, items)
+    return items
 
 
 def get_item_by_id(context, item_id):
-    return IMPL.get_item_by_id(context, item_id)
+    cache = _get_item_cache(context)
+    if not cache:
+        return IMPL.get_item_by_id(context, item_id)
+    item = cache.get_item(context.project_id, item_id)
+    if item is None:
+        item = IMPL.get_item_by_id(context, item_id)
+        if item is not None:
+            cache.set_item(context.project_id, item)
+    return item
 
 
 def get_items_by_ids(context, item_ids):
-    return IMPL.get_items_by_ids(context, item_ids)
+    cache = _get_item_cache(context)
+    if not cache or not item_ids:
+        return IMPL.get_items_by_ids(context, item_ids)
+    items = []
+    missed_ids = set()
+    for item_id in set(item_ids):
+        item = cache.get_item(context.project_id, item_id)
+        if item is None:
+            missed_ids.add(item_id)
+        else:
+            items.append(item)
+    if missed_ids:
+        missed_items = IMPL.get_items_by_ids(context, missed_ids)
+        for item in missed_items:
+            cache.set_item(context.project_id, item)
+        items.extend(missed_items)
+    return items
+
+
+def get_item_by_os_id(context, kind, os_id):
+    return IMPL.get_item_by_os_id(context, kind, os_id)
 
 
 def get_public_items(context, kind, item_ids=None):
     return IMPL.get_public_items(context, kind, item_ids)
 
 
+def get_project_items_ids(context, kind):
+    return IMPL.get_project_items_ids(context, kind)
+
+
 def get_items_ids(context, kind, item_ids=None, item_os_ids=None):
     return IMPL.get_items_ids(context, kind, item_ids=item_ids,
                               item_os_ids=item_os_ids)
@@ -126,12 +256,16 @@ def get_items_project_ids(context, kind, item_ids=None, item_project_ids=None):
 
 
 def add_tags(context, tags):
+    read_from_primary(context)
     return IMPL.add_tags(context, tags)
 
 
 def delete_tags(context, item_ids, tag_pairs=None):
+    read_from_primary(context)
     return IMPL.delete_tags(context, item_ids, tag_pairs)
 
 
-def get_tags(context, kinds=None, item_ids=None):
-    return IMPL.get_tags(context, kinds, item_ids)
+def get_tags(context, kinds=None, item_ids=None, marker=None, limit=None):
+    if marker is None and limit is None:
+        return IMPL.get_tags(context, kinds, item_ids)
+    return IMPL.get_tags(context, kinds, item_ids, marker=marker, limit=limit)
@@ -14,23 +14,41 @@
 
 """Implementation of SQLAlchemy backend."""
 
-import copy
+import collections
 import functools
-import json
 import random
 import sys
 
 from oslo_config import cfg
 from oslo_db import exception as db_exception
 from oslo_db.sqlalchemy import session as db_session
+from oslo_log import log as logging
+from oslo_utils import importutils
 from sqlalchemy import and_
 from sqlalchemy import or_
+from sqlalchemy.orm import exc as orm_exception
 from sqlalchemy.sql import bindparam
+from sqlalchemy.sql import text
 
 import ec2api.context
 from ec2api.db.sqlalchemy import models
 
+item_data_opts = [
+    cfg.ListOpt('item_data_json_modules',
+                default=['json'],
+                help='Modules to encode and decode data of items in DB '
+                     'with. The first importable one is used. simplejson '
+                     'is faster, but under Python 2 it decodes ASCII '
+                     'strings to str instead of unicode.'),
+]
+
 CONF = cfg.CONF
+CONF.register_opts(item_data_opts, 'database')
+LOG = logging.getLogger(__name__)
+
+# NOTE(ft): keep the number of bound parameters of a statement below
+# the SQLite limit (999)
+_TAGS_BATCH_SIZE = 200
 
 
 _MASTER_FACADE = None
@@ -49,9 +67,9 @@ def get_engine():
     return facade.get_engine()
 
 
-def get_session(**kwargs):
+def get_session(use_slave=False, **kwargs):
     facade = _create_facade_lazily()
-    return facade.get_session(**kwargs)
+    return facade.get_session(use_slave=use_slave, **kwargs)
 
 
 def get_backend():
@@ -77,12 +95,38 @@ def model_query(context, model, *args, **kwargs):
 
     :param context: context to query under
     :param session: if present, the session to use
+    :param use_slave: if True, the session uses slave connection if it's
+        configured
     """
-    session = kwargs.get('session') or get_session()
+    session = (kwargs.get('session') or
+               get_session(use_slave=kwargs.get('use_slave', False)))
 
     return session.query(model, *args)
 
 
+_json = None
+
+
+def _use_slave(context):
+    return getattr(context, 'read_from_replica', False)
+
+
+def _get_json():
+    global _json
+    if _json is None:
+        for module_name in CONF.database.item_data_json_modules:
+            try:
+                _json = importutils.import_module(module_name)
+            except ImportError:
+                continue
+            LOG.debug('%s is used to encode item data', module_name)
+            break
+        else:
+            raise ImportError('None of %s modules are importable' %
+                              CONF.database.item_data_json_modules)
+    return _json
+
+
 def _new_id(kind, os_id):
     obj_id = "%(kind)s-%(id)08x" % {"kind": kind,
                                     "id": random.randint(1, 0xffffffff)}
@@ -97,6 +141,7 @@ def add_item(context, kind, data, project_id=None):
     item_ref.update({
         "project_id": project_id,
         "id": _new_id(kind, data.get("os_id")),
+        "kind": kind,
     })
     item_ref.update(_pack_item_data(data))
     try:
@@ -109,7 +154,7 @@ def add_item(context, kind, data, project_id=None):
                     filter_by(os_id=data["os_id"]).
                     filter(or_(models.Item.project_id == project_id,
                                models.Item.project_id.is_(None))).
-                    filter(models.Item.id.like('%s-%%' % kind)).
+                    filter_by(kind=kind).
                     one())
         item_data = _unpack_item_data(item_ref)
         item_data.update(data)
@@ -124,6 +169,7 @@ def add_item_id(context, kind, os_id, project_id=None):
     item_ref = models.Item()
     item_ref.update({
         "id": _new_id(kind, os_id),
+        "kind": kind,
         "os_id": os_id,
     })
     if project_id:
@@ -142,33 +188,32 @@ def add_item_id(context, kind, os_id, project_id=None):
 
 @require_context
 def update_item(context, item):
-    item_ref = (model_query(context, models.Item).
-                filter_by(project_id=context.project_id,
-                          id=item["id"]).
-                one())
-    item_ref.update(_pack_item_data(item))
-    item_ref.save()
-    return _unpack_item_data(item_ref)
+    item_data = _pack_item_data(item)
+    session = get_session()
+    with session.begin():
+        updated_count = (model_query(context, models.Item, session=session).
+                         filter_by(project_id=context.project_id,
+                                   id=item["id"]).
+                         update(item_data, synchronize_session=False))
+    if not updated_count:
+        raise orm_exception.NoResultFound()
+    return _unpack_item_data(models.Item(id=item["id"], **item_data))
 
 
 @require_context
 def delete_item(context, item_id):
     session = get_session()
-    deleted_count = (model_query(context, models.Item, session=session).
-                     filter_by(project_id=context.project_id,
-                               id=item_id).
-                     delete(synchronize_session=False))
-    if not deleted_count:
-        return
-    try:
-        (model_query(context, models.Tag, session=session).
-         filter_by(project_id=context.project_id,
-                   item_id=item_id).
-         delete(synchronize_session=False))
-    except Exception:
-        # NOTE(ft): ignore all exceptions because DB integrity is insignificant
-        # for tags
-        pass
+    with session.begin():
+        deleted_count = (model_query(context, models.Item, session=session).
+                         filter_by(project_id=context.project_id,
+                                   id=item_id).
+                         delete(synchronize_session=False))
+        if deleted_count:
+            (model_query(context, models.Tag, session=session).
+             filter_by(project_id=context.project_id,
+                       item_id=item_id).
+             delete(synchronize_session=False))
+    return deleted_count
 
 
 @require_context
@@ -176,6 +221,7 @@ def restore_item(context, kind, data):
     item_ref = models.Item()
     item_ref.update({
         "project_id": context.project_id,
+        "kind": kind,
     })
     item_ref.id = data['id']
     item_ref.update(_pack_item_data(data))
@@ -186,15 +232,17 @@ def restore_item(context, kind, data):
 @require_context
 def get_items(context, kind):
     return [_unpack_item_data(item)
-            for item in (model_query(context, models.Item).
-                         filter_by(project_id=context.project_id).
-                         filter(models.Item.id.like('%s-%%' % kind)).
+            for item in (model_query(context, models.Item,
+                                     use_slave=_use_slave(context)).
+                         filter_by(project_id=context.project_id,
+                                   kind=kind).
                          all())]
 
 
 @require_context
 def get_item_by_id(context, item_id):
-    return (_unpack_item_data(model_query(context, models.Item).
+    return (_unpack_item_data(model_query(context, models.Item,
+                                          use_slave=_use_slave(context)).
             filter_by(project_id=context.project_id,
                       id=item_id).
             first()))
@@ -205,49 +253,154 @@ def get_items_by_ids(context, item_ids):
     if not item_ids:
         return []
     return [_unpack_item_data(item)
-            for item in (model_query(context, models.Item).
+            for item in (model_query(context, models.Item,
+                                     use_slave=_use_slave(context)).
                          filter_by(project_id=context.project_id).
                          filter(models.Item.id.in_(item_ids)).
                          all())]
 
 
+@require_context
+def get_item_by_os_id(context, kind, os_id):
+    return (_unpack_item_data(model_query(context, models.Item,
+                                          use_slave=_use_slave(context)).
+            filter_by(os_id=os_id,
+                      project_id=context.project_id,
+                      kind=kind).
+            first()))
+
+
 @require_context
 def get_public_items(context, kind, item_ids=None):
-    query = (model_query(context, models.Item).
-             filter(models.Item.id.like('%s-%%' % kind)).
-             filter(models.Item.data.like('%"is_public": True%')))
+    query = (model_query(context, models.Item,
+                         use_slave=_use_slave(context)).
+             filter_by(kind=kind, is_public=True))
     if item_ids:
         query = query.filter(models.Item.id.in_(item_ids))
     return [_unpack_item_data(item)
             for item in query.all()]
 
 
+@require_context
+def get_project_items_ids(context, kind):
+    # NOTE(ft): select ids only to not load and decode item data
+    return [{'id': item_id, 'os_id': os_id}
+            for item_id, os_id in (model_query(context, models.Item.id,
+                                               models.Item.os_id,
+                                               use_slave=_use_slave(context)).
+                                   filter_by(project_id=context.project_id,
+                                             kind=kind).
+                                   all())]
+
+
 @require_context
 def get_items_ids(context, kind, item_ids=None, item_os_ids=None):
-    query = (model_query(context, models.Item).
-             filter(models.Item.id.like('%s-%%' % kind)))
+    query = (model_query(context, models.Item.id, models.Item.os_id,
+                         use_slave=_use_slave(context)).
+             filter_by(kind=kind))
     if item_ids:
         query = query.filter(models.Item.id.in_(item_ids))
     if item_os_ids:
         query = query.filter(models.Item.os_id.in_(item_os_ids))
-    return [(item['id'], item['os_id'])
-            for item in query.all()]
+    return [(item_id, os_id)
+            for item_id, os_id in query.all()]
 
 
 @require_context
 def get_items_project_ids(context, kind, item_ids=None, item_project_ids=None):
-    query = (model_query(context, models.Item).
-             filter(models.Item.id.like('%s-%%' % kind)))
+    query = (model_query(context, models.Item.id, models.Item.project_id,
+                         use_slave=_use_slave(context)).
+             filter_by(kind=kind))
     if item_ids:
         query = query.filter(models.Item.id.in_(item_ids))
     if item_project_ids:
         query = query.filter(models.Item.project_id.in_(item_project_ids))
-    return [{'id':item['id'], 'project_id':item['project_id']}
-            for item in query.all()]
+    return [{'id': item_id, 'project_id': project_id}
+            for item_id, project_id in query.all()]
 
 
 @require_context
 def add_tags(context, tags):
+    # NOTE(ft): the last value of a duplicated key wins, as if tags were
+    # added one by one
+    values = collections.OrderedDict(((tag['item_id'], tag['key']),
+                                      tag['value'])
+                                     for tag in tags)
+    if not values:
+        return
+    session = get_session()
+    try:
+        with session.begin():
+            if get_engine().name == 'mysql':
+                _upsert_tags_mysql(context, session, values)
+            else:
+                _upsert_tags(context, session, values)
+    except db_exception.DBDuplicateEntry:
+        # NOTE(ft): a concurrent request has inserted some of the tags
+        _add_tags_one_by_one(context, tags)
+
+
+def _chunks(values, size):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _upsert_tags_mysql(context, session, values):
+    for chunk in _chunks(values.items(), _TAGS_BATCH_SIZE):
+        params = {'project_id': context.project_id}
+        rows = []
+        for i, ((item_id, key), value) in enumerate(chunk):
+            rows.append('(:project_id, :item_id_%(i)s, :key_%(i)s, '
+                        ':value_%(i)s)' % {'i': i})
+            params.update({'item_id_%s' % i: item_id,
+                           'key_%s' % i: key,
+                           'value_%s' % i: value})
+        session.execute(
+            text('INSERT INTO tags (project_id, item_id, `key`, value) '
+                 'VALUES %s ON DUPLICATE KEY UPDATE value = VALUES(value)' %
+                 ', '.join(rows)),
+            params)
+
+
+def _upsert_tags(context, session, values):
+    tags = models.Tag.__table__
+    existing_keys = set()
+    item_ids = set(item_id for item_id, _key in values)
+    for chunk in _chunks(item_ids, _TAGS_BATCH_SIZE):
+        existing_keys.update(
+            (tag.item_id, tag.key)
+            for tag in (model_query(context, models.Tag.item_id,
+                                    models.Tag.key, session=session).
+                        filter_by(project_id=context.project_id).
+                        filter(models.Tag.item_id.in_(chunk)).
+                        all()))
+
+    updates = [{'tag_item_id': item_id, 'tag_key': key, 'tag_value': value}
+               for (item_id, key), value in values.items()
+               if (item_id, key) in existing_keys]
+    if updates:
+        session.execute(
+            tags.update().
+            where(and_(tags.c.project_id == context.project_id,
+                       # NOTE(ft): item_id param name is reserved for
+                       # sqlalchemy internal use
+                       tags.c.item_id == bindparam('tag_item_id'),
+                       tags.c.key == bindparam('tag_key'))).
+            values(value=bindparam('tag_value')),
+            updates)
+
+    inserts = [{'project_id': context.project_id,
+                'item_id': item_id,
+                'key': key,
+                'value': value}
+               for (item_id, key), value in values.items()
+               if (item_id, key) not in existing_keys]
+    for chunk in _chunks(inserts, _TAGS_BATCH_SIZE):
+        session.execute(tags.insert().values(chunk))
+
+
+def _add_tags_one_by_one(context, tags):
     session = get_session()
     get_query = (model_query(context, models.Tag, session=session).
                  filter_by(project_id=context.project_id,
@@ -301,8 +454,14 @@ def delete_tags(context, item_ids, tag_pairs=None):
 
 
 @require_context
-def get_tags(context, kinds=None, item_ids=None):
-    query = (model_query(context, models.Tag).
+def get_tags(context, kinds=None, item_ids=None, marker=None, limit=None):
+    """Get tags of items.
+
+    Pass marker, which is a pair of item id and tag key, and/or limit to
+    get tags ordered by item id and key.
+    """
+    query = (model_query(context, models.Tag,
+                         use_slave=_use_slave(context)).
              filter_by(project_id=context.project_id))
     if kinds:
         fltr = None
@@ -312,6 +471,15 @@ def get_tags(context, kinds=None, item_ids=None):
         query = query.filter(fltr)
     if item_ids:
         query = query.filter(models.Tag.item_id.in_(item_ids))
+    if marker is not None or limit is not None:
+        query = query.order_by(models.Tag.item_id, models.Tag.key)
+    if marker is not None:
+        marker_item_id, marker_key = marker
+        query = query.filter(or_(models.Tag.item_id > marker_item_id,
+                                 and_(models.Tag.item_id == marker_item_id,
+                                      models.Tag.key > marker_key)))
+    if limit is not None:
+        query = query.limit(limit)
     return [dict(item_id=tag.item_id,
                  key=tag.key,
                  value=tag.value)
@@ -319,12 +487,16 @@ def get_tags(context, kinds=None, item_ids=None):
 
 
 def _pack_item_data(item_data):
-    data = copy.deepcopy(item_data)
-    data.pop("id", None)
+    # NOTE(ft): the data is dumped right away, so a shallow copy is enough
+    # to not change the passed item
+    data = dict((key, value) for key, value in item_data.items()
+                if key not in ("id", "os_id", "vpc_id"))
     return {
-        "os_id": data.pop("os_id", None),
-        "vpc_id": data.pop("vpc_id", None),
-        "data": json.dumps(data),
+        "os_id": item_data.get("os_id"),
+        "vpc_id": item_data.get("vpc_id"),
+        # NOTE(ft): is_public is kept in data as well to return it back as is
+        "is_public": bool(data.get("is_public")),
+        "data": _get_json().dumps(data),
     }
 
 
@@ -332,7 +504,7 @@ def _unpack_item_data(item_ref):
     if item_ref is None:
         return None
     data = item_ref.data
-    data = json.loads(data) if data is not None else {}
+    data = _get_json().loads(data) if data is not None else {}
     data["id"] = item_ref.id
     data["os_id"] = item_ref.os_id
     data["vpc_id"] = item_ref.vpc_id
@@ -0,0 +1,46 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from sqlalchemy import Column, Index, MetaData, String, Table
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    items = Table('items', meta, autoload=True)
+    kind = Column('kind', String(length=30))
+    items.create_column(kind)
+
+    # NOTE(ft): kind is the prefix of item id (e.g. 'vpc' for 'vpc-1234abcd')
+    if migrate_engine.name == 'mysql':
+        kind_expr = "SUBSTRING_INDEX(id, '-', 1)"
+    elif migrate_engine.name == 'postgresql':
+        kind_expr = "split_part(id, '-', 1)"
+    else:
+        kind_expr = "substr(id, 1, instr(id, '-') - 1)"
+    migrate_engine.execute("UPDATE items SET kind = %s" % kind_expr)
+
+    Index('items_project_id_kind_idx',
+          items.c.project_id, items.c.kind).create(migrate_engine)
+    Index('items_kind_idx', items.c.kind).create(migrate_engine)
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    items = Table('items', meta, autoload=True)
+    Index('items_kind_idx', items.c.kind).drop(migrate_engine)
+    Index('items_project_id_kind_idx',
+          items.c.project_id, items.c.kind).drop(migrate_engine)
+    items.drop_column('kind')
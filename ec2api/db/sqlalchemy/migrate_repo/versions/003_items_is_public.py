@@ -0,0 +1,45 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from sqlalchemy import Boolean, Column, Index, MetaData, Table
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    items = Table('items', meta, autoload=True)
+    is_public = Column('is_public', Boolean, default=False)
+    items.create_column(is_public)
+
+    migrate_engine.execute(items.update().values(is_public=False))
+    # NOTE(ft): data is a json dump, so the flag is stored as 'true'
+    migrate_engine.execute(
+        items.update().
+        where(items.c.data.like('%"is_public": true%')).
+        values(is_public=True))
+
+    # NOTE(ft): the new index covers lookups by kind only as well
+    Index('items_kind_idx', items.c.kind).drop(migrate_engine)
+    Index('items_kind_is_public_idx',
+          items.c.kind, items.c.is_public).create(migrate_engine)
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+
+    items = Table('items', meta, autoload=True)
+    Index('items_kind_is_public_idx',
+          items.c.kind, items.c.is_public).drop(migrate_engine)
+    Index('items_kind_idx', items.c.kind).create(migrate_engine)
+    items.drop_column('is_public')
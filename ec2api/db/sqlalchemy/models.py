@@ -18,12 +18,15 @@ SQLAlchemy models for ec2api data.
 
 from oslo_db.sqlalchemy import models
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, PrimaryKeyConstraint, String, Text
+from sqlalchemy import Boolean, Column, Index, PrimaryKeyConstraint, String
+from sqlalchemy import Text
 from sqlalchemy import UniqueConstraint
 
 BASE = declarative_base()
 
 ITEMS_OS_ID_INDEX_NAME = 'items_os_id_idx'
+ITEMS_PROJECT_ID_KIND_INDEX_NAME = 'items_project_id_kind_idx'
+ITEMS_KIND_IS_PUBLIC_INDEX_NAME = 'items_kind_is_public_idx'
 
 
 class EC2Base(models.ModelBase):
@@ -43,11 +46,15 @@ class Item(BASE, EC2Base):
     __table_args__ = (
         PrimaryKeyConstraint('id'),
         UniqueConstraint('os_id', name=ITEMS_OS_ID_INDEX_NAME),
+        Index(ITEMS_PROJECT_ID_KIND_INDEX_NAME, 'project_id', 'kind'),
+        Index(ITEMS_KIND_IS_PUBLIC_INDEX_NAME, 'kind', 'is_public'),
     )
     id = Column(String(length=30))
+    kind = Column(String(length=30))
     project_id = Column(String(length=64))
     vpc_id = Column(String(length=12))
     os_id = Column(String(length=36))
+    is_public = Column(Boolean, default=False)
     data = Column(Text())
 
 
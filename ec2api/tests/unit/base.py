@@ -23,6 +23,7 @@ from oslo_config import fixture as config_fixture
 from oslotest import base as test_base
 
 import ec2api.api.apirequest
+from ec2api.api import clients
 from ec2api.api import ec2utils
 import ec2api.db.sqlalchemy.api
 from ec2api.tests.unit import fakes
@@ -67,6 +68,11 @@ class ApiTestCase(test_base.BaseTestCase):
         cinder_patcher.start().return_value = self.cinder
         self.addCleanup(cinder_patcher.stop)
 
+        # NOTE(ft): clients of the same fake token must not be reused by
+        # other tests, since they are mocks of those tests
+        clients._clients_cache = None
+        self.addCleanup(setattr, clients, '_clients_cache', None)
+
         db_api_patcher = mock.patch('ec2api.db.api.IMPL',
                                     autospec=ec2api.db.sqlalchemy.api)
         self.db_api = db_api_patcher.start()
@@ -112,6 +118,10 @@ class ApiTestCase(test_base.BaseTestCase):
             tools.get_db_api_get_items_by_ids(*self._db_items))
         self.db_api.get_items_ids.side_effect = (
             tools.get_db_api_get_items_ids(*self._db_items))
+        self.db_api.get_project_items_ids.side_effect = (
+            tools.get_db_api_get_project_items_ids(*self._db_items))
+        self.db_api.get_item_by_os_id.side_effect = (
+            tools.get_db_api_get_item_by_os_id(*self._db_items))
 
     def add_mock_db_items(self, *items):
         merged_items = items + tuple(item for item in self._db_items
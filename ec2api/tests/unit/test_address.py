@@ -588,6 +588,36 @@ class AddressTestCase(base.ApiTestCase):
               ('private-ip-address', fakes.IP_NETWORK_INTERFACE_2),
               ('public-ip', fakes.IP_ADDRESS_2)])
 
+    @mock.patch.object(address.route_status, 'get_statuses')
+    def test_describe_addresses_route_statuses(self, get_statuses):
+        address.address_engine = (
+            address.AddressEngineNeutron())
+        get_statuses.return_value = {
+            fakes.IP_ADDRESS_2: address.route_status.STATUS_ACTIVE}
+        self.neutron.list_floatingips.return_value = (
+            {'floatingips': [fakes.OS_FLOATING_IP_1,
+                             fakes.OS_FLOATING_IP_2]})
+        self.neutron.list_ports.return_value = (
+            {'ports': [fakes.OS_PORT_1,
+                       fakes.OS_PORT_2]})
+        self.set_mock_db_items(
+            tools.update_dict(fakes.DB_ADDRESS_1,
+                              {'status': address.route_status.STATUS_ACTIVE}),
+            fakes.DB_ADDRESS_2, fakes.DB_INSTANCE_1,
+            fakes.DB_NETWORK_INTERFACE_1, fakes.DB_NETWORK_INTERFACE_2)
+
+        self.execute('DescribeAddresses', {'PublicIp.1': fakes.IP_ADDRESS_2})
+        get_statuses.assert_called_once_with(set([fakes.IP_ADDRESS_2]))
+
+        # NOTE(ft): the filter is pushed down to Neutron
+        get_statuses.reset_mock()
+        self.neutron.list_floatingips.return_value = (
+            {'floatingips': [fakes.OS_FLOATING_IP_2]})
+        self.execute('DescribeAddresses',
+                     {'Filter.1.Name': 'public-ip',
+                      'Filter.1.Value.1': fakes.IP_ADDRESS_2})
+        get_statuses.assert_called_once_with(set([fakes.IP_ADDRESS_2]))
+
     def test_describe_addresses_ec2_classic(self):
         address.address_engine = (
             address.AddressEngineNova())
@@ -14,11 +14,13 @@
 
 import fixtures
 import mock
+from neutronclient.common import exceptions as neutron_exception
 from novaclient import exceptions as nova_exception
 from oslo_config import fixture as config_fixture
 from oslotest import base as test_base
 
 from ec2api.api import clients
+from ec2api import context as ec2_context
 
 
 class ClientsTestCase(test_base.BaseTestCase):
@@ -27,7 +29,9 @@ class ClientsTestCase(test_base.BaseTestCase):
         super(ClientsTestCase, self).setUp()
 
         conf = self.useFixture(config_fixture.Config())
-        conf.config(keystone_url='keystone_url')
+        conf.config(keystone_url='keystone_url',
+                    os_client_cache_ttl=0)
+        self.conf = conf
 
     @mock.patch('novaclient.client.Client')
     def test_nova(self, nova):
@@ -44,7 +48,8 @@ class ClientsTestCase(test_base.BaseTestCase):
         nova.assert_called_with(
             '2.3', bypass_url='novav21_url', cacert=None, insecure=False,
             auth_url='keystone_url', auth_token='fake_token',
-            username=None, api_key=None, project_id=None)
+            username=None, api_key=None, project_id=None,
+            connection_pool=True)
         self.assertEqual(0, len(logs.output))
 
         # test switching to v2 client
@@ -55,7 +60,8 @@ class ClientsTestCase(test_base.BaseTestCase):
         nova.assert_called_with(
             '2', bypass_url='novav21_url', cacert=None, insecure=False,
             auth_url='keystone_url', auth_token='fake_token',
-            username=None, api_key=None, project_id=None)
+            username=None, api_key=None, project_id=None,
+            connection_pool=True)
         self.assertNotEqual(0, len(logs.output))
 
         # test raising of an exception if v2 client is not supported as well
@@ -74,7 +80,8 @@ class ClientsTestCase(test_base.BaseTestCase):
         nova.assert_called_with(
             '2.3', bypass_url='nova_url', cacert=None, insecure=False,
             auth_url='keystone_url', auth_token='fake_token',
-            username=None, api_key=None, project_id=None)
+            username=None, api_key=None, project_id=None,
+            connection_pool=True)
         self.assertNotEqual(0, len(logs.output))
 
         # test behavior if 'compute' service type is not found as well
@@ -83,7 +90,8 @@ class ClientsTestCase(test_base.BaseTestCase):
         nova.assert_called_with(
             '2.3', bypass_url=None, cacert=None, insecure=False,
             auth_url='keystone_url', auth_token='fake_token',
-            username=None, api_key=None, project_id=None)
+            username=None, api_key=None, project_id=None,
+            connection_pool=True)
 
     @mock.patch('neutronclient.v2_0.client.Client')
     def test_neutron(self, neutron):
@@ -136,3 +144,62 @@ class ClientsTestCase(test_base.BaseTestCase):
             auth_url='keystone_url', cacert=None, insecure=False,
             token='fake_token', tenant_id='fake_project',
             project_id='fake_project')
+
+    @mock.patch('neutronclient.v2_0.client.Client')
+    def test_client_cache(self, neutron):
+        self.conf.config(os_client_cache_ttl=300)
+        clients._clients_cache = None
+        self.addCleanup(setattr, clients, '_clients_cache', None)
+        neutron.side_effect = lambda **kwargs: mock.Mock()
+
+        context = mock.Mock(auth_token='fake_token', tenant='fake_project')
+        res = clients.neutron(context)
+        self.assertIs(res, clients.neutron(context))
+        self.assertEqual(1, neutron.call_count)
+
+        other_context = mock.Mock(auth_token='other_token',
+                                  tenant='fake_project')
+        self.assertIsNot(res, clients.neutron(other_context))
+        self.assertEqual(2, neutron.call_count)
+
+        # NOTE(ft): a client without token is never cached
+        context = mock.Mock(auth_token=None, tenant='fake_project')
+        self.assertIsNot(clients.neutron(context), clients.neutron(context))
+
+    @mock.patch('ec2api.context.get_os_admin_context')
+    @mock.patch('neutronclient.v2_0.client.Client')
+    def test_admin_client_reauthentication(self, neutron,
+                                           get_os_admin_context):
+        self.addCleanup(setattr, ec2_context, '_admin_auth',
+                        ec2_context._admin_auth)
+        ec2_context._admin_auth = {'auth_token': 'admin_token'}
+        old_client = mock.Mock()
+        old_client.list_ports.side_effect = neutron_exception.Unauthorized()
+        new_client = mock.Mock()
+        new_client.list_ports.return_value = {'ports': []}
+        neutron.side_effect = [old_client, new_client]
+        get_os_admin_context.return_value = mock.Mock(
+            auth_token='new_admin_token', tenant='fake_project')
+
+        context = mock.Mock(auth_token='admin_token', tenant='fake_project',
+                            is_os_admin=True)
+        res = clients.neutron(context)
+        self.assertEqual({'ports': []}, res.list_ports(device_id='fake'))
+        self.assertIsNone(ec2_context._admin_auth)
+        old_client.list_ports.assert_called_once_with(device_id='fake')
+        new_client.list_ports.assert_called_once_with(device_id='fake')
+        neutron.assert_called_with(
+            auth_url='keystone_url', cacert=None, service_type='network',
+            insecure=False, token='new_admin_token', tenant_id='fake_project',
+            endpoint_url=mock.ANY)
+
+        # NOTE(ft): a token is refreshed once for a call
+        new_client.list_ports.side_effect = neutron_exception.Unauthorized()
+        neutron.side_effect = [new_client]
+        self.assertRaises(neutron_exception.Unauthorized,
+                          res.list_ports)
+
+        # NOTE(ft): clients of not admin tokens are not wrapped
+        context = mock.Mock(auth_token='fake_token', tenant='fake_project')
+        neutron.side_effect = None
+        self.assertEqual(neutron.return_value, clients.neutron(context))
@@ -16,6 +16,7 @@ import mock
 from oslotest import base as test_base
 
 from ec2api.api import common
+from ec2api import exception
 
 
 class OnCrashCleanerTestCase(test_base.BaseTestCase):
@@ -134,6 +135,56 @@ class OnCrashCleanerTestCase(test_base.BaseTestCase):
              {'name': 'prop2', 'value': ['val-123']}])
         self.assertTrue(res)
 
+    def test_filter_compiled(self):
+        obj = common.TaggableItemsDescriber()
+        obj.FILTER_MAP = {'prop1': 'prop-1',
+                          'prop2': ('prop-2', 'sub'),
+                          'prop3': ['prop-3', 'sub'],
+                          'tag': 'tagSet'}
+        item = {'prop-1': 'val-0',
+                'prop-2': {'sub': 123},
+                'prop-3': [{'sub': 'val-1'}, {'sub': 'val-2'}, {}],
+                'tagSet': [{'key': 'Name', 'value': 'fake-name'}]}
+
+        filters = [{'name': 'prop1', 'value': ['val-*']},
+                   {'name': 'prop2', 'value': ['12?', '0']},
+                   {'name': 'prop3', 'value': ['val-[2]']},
+                   {'name': 'tag', 'value': [{'key': 'Name',
+                                              'value': ['fake-*']}]}]
+        self.assertFalse(obj.filtered_out(item, filters))
+        self.assertTrue(obj.filtered_out({'prop-1': 'val-0'}, filters))
+
+        self.assertTrue(obj.filtered_out(
+            item, [{'name': 'prop3', 'value': ['val-3', 'val']}]))
+        self.assertTrue(obj.filtered_out(
+            item, [{'name': 'tag', 'value': [{'key': 'fake-name',
+                                              'value': ['*']}]}]))
+
+        with mock.patch.object(obj, 'compile_filters',
+                               wraps=obj.compile_filters) as compile_filters:
+            filters = [{'name': 'prop1', 'value': ['val-0']}]
+            obj.filtered_out(item, filters)
+            obj.filtered_out({}, filters)
+            compile_filters.assert_called_once_with(filters)
+
+        self.assertRaises(
+            exception.InvalidParameterValue,
+            obj.filtered_out, item, [{'name': 'prop4', 'value': ['val']}])
+
+    def test_get_os_items_by_ids(self):
+        def get_os_item(os_id):
+            if os_id == 'os_id_2':
+                raise self.FakeException()
+            return {'id': os_id}
+
+        self.assertEqual(
+            [{'id': 'os_id_1'}, {'id': 'os_id_3'}],
+            common.get_os_items_by_ids(get_os_item,
+                                       ['os_id_1', 'os_id_2', 'os_id_3'],
+                                       self.FakeException))
+        self.assertEqual([], common.get_os_items_by_ids(get_os_item, [],
+                                                        self.FakeException))
+
 
 def fake_standalone_crashed_clean_method():
     raise Exception()
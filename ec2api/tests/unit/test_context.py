@@ -38,11 +38,16 @@ class ContextTestCase(test_base.BaseTestCase):
     def test_get_os_admin_context(self, keystone):
         service_catalog = mock.Mock()
         service_catalog.get_data.return_value = 'fake_service_catalog'
+        self.addCleanup(setattr, ec2_context, '_admin_auth',
+                        ec2_context._admin_auth)
+        ec2_context._admin_auth = None
         ec2_context._keystone_client_class = mock.Mock(
             return_value=mock.Mock(
                 auth_user_id='fake_user_id',
                 auth_tenant_id='fake_project_id',
                 auth_token='fake_token',
+                auth_ref=mock.Mock(
+                    **{'will_expire_soon.return_value': False}),
                 service_catalog=service_catalog))
         context = ec2_context.get_os_admin_context()
         self.assertEqual('fake_user_id', context.user_id)
@@ -65,6 +70,38 @@ class ContextTestCase(test_base.BaseTestCase):
         self.assertEqual(context, ec2_context.get_os_admin_context())
         self.assertFalse(keystone.called)
 
+    @mock.patch('ec2api.openstack.common.local.store')
+    def test_get_os_admin_context_reuses_token(self, store):
+        store.context = None
+        auth_ref = mock.Mock(**{'will_expire_soon.return_value': False})
+        self.addCleanup(setattr, ec2_context, '_admin_auth',
+                        ec2_context._admin_auth)
+        ec2_context._admin_auth = None
+        ec2_context._keystone_client_class = mock.Mock(
+            return_value=mock.Mock(auth_user_id='fake_user_id',
+                                   auth_tenant_id='fake_project_id',
+                                   auth_token='fake_token',
+                                   auth_ref=auth_ref))
+        stats = ec2_context.get_admin_auth_stats()
+
+        ec2_context.get_os_admin_context()
+        store.context = None
+        context = ec2_context.get_os_admin_context()
+        self.assertEqual('fake_token', context.auth_token)
+        self.assertEqual(1, ec2_context._keystone_client_class.call_count)
+        auth_ref.will_expire_soon.assert_called_with(
+            stale_duration=cfg.CONF.admin_token_refresh_margin)
+
+        # NOTE(ft): a new token is got before the current one expires
+        auth_ref.will_expire_soon.return_value = True
+        store.context = None
+        ec2_context.get_os_admin_context()
+        self.assertEqual(2, ec2_context._keystone_client_class.call_count)
+
+        new_stats = ec2_context.get_admin_auth_stats()
+        self.assertEqual(2, new_stats['refreshed'] - stats['refreshed'])
+        self.assertEqual(1, new_stats['reused'] - stats['reused'])
+
     @mock.patch('keystoneclient.client.Client')
     def test_get_keystone_client_class(self, client):
         client.return_value = mock.MagicMock(spec=keystone_client_v2.Client)
@@ -12,9 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+
+import mock
 from oslo_config import cfg
+from oslo_config import fixture as config_fixture
 from oslotest import base as test_base
 from sqlalchemy.orm import exc as orm_exception
+import six
 
 from ec2api.api import validator
 from ec2api import config
@@ -172,18 +177,30 @@ class DbApiTestCase(test_base.BaseTestCase):
 
     def test_delete_item(self):
         item = db_api.add_item(self.context, 'fake', {})
-        db_api.delete_item(self.context, item['id'])
-        item = db_api.get_item_by_id(self.context, item['id'])
-        self.assertIsNone(item)
+        db_api.add_tags(self.context, [{'item_id': item['id'],
+                                        'key': 'key',
+                                        'value': 'val'}])
+        self.assertEqual(1, db_api.delete_item(self.context, item['id']))
+        self.assertIsNone(db_api.get_item_by_id(self.context, item['id']))
+        self.assertEqual([], db_api.get_tags(self.context,
+                                             item_ids=[item['id']]))
 
         # NOTE(ft): delete not existing item should pass quitely
-        db_api.delete_item(self.context, fakes.random_ec2_id('fake'))
+        self.assertEqual(0, db_api.delete_item(self.context,
+                                               fakes.random_ec2_id('fake')))
 
         item = db_api.add_item(self.context, 'fake', {})
         db_api.delete_item(self.other_context, item['id'])
         item = db_api.get_item_by_id(self.context, item['id'])
         self.assertIsNotNone(item)
 
+    def test_restore_item(self):
+        item = db_api.add_item(self.context, 'fake', {'key': 'val'})
+        db_api.delete_item(self.context, item['id'])
+        db_api.restore_item(self.context, 'fake', item)
+        items = db_api.get_items(self.context, 'fake')
+        self.assertThat(items, matchers.ListMatches([item]))
+
     def _setup_items(self):
         db_api.add_item(self.context, 'fake', {})
         db_api.add_item(self.context, 'fake', {'is_public': True})
@@ -217,6 +234,23 @@ class DbApiTestCase(test_base.BaseTestCase):
         item = db_api.get_item_by_id(self.context, fakes.random_ec2_id('fake'))
         self.assertIsNone(item)
 
+    def test_get_item_by_os_id(self):
+        self._setup_items()
+        item = db_api.get_items(self.context, 'fake1')[0]
+        other_item = db_api.get_items(self.other_context, 'fake1')[0]
+
+        self.assertThat(
+            db_api.get_item_by_os_id(self.context, 'fake1', item['os_id']),
+            matchers.DictMatches(item))
+        self.assertIsNone(
+            db_api.get_item_by_os_id(self.context, 'fake', item['os_id']))
+        self.assertIsNone(
+            db_api.get_item_by_os_id(self.context, 'fake1',
+                                     other_item['os_id']))
+        self.assertIsNone(
+            db_api.get_item_by_os_id(self.context, 'fake1',
+                                     fakes.random_os_id()))
+
     def test_get_items_by_ids(self):
         self._setup_items()
         fake_kind_items = db_api.get_items(self.context, 'fake')
@@ -301,6 +335,19 @@ class DbApiTestCase(test_base.BaseTestCase):
         items = db_api.get_public_items(self.context, 'fake0', [])
         self.assertEqual(0, len(items))
 
+    def test_get_public_items_after_update(self):
+        item = db_api.add_item(self.context, 'fake', {'is_public': False})
+        self.assertEqual([], db_api.get_public_items(self.context, 'fake'))
+
+        item['is_public'] = True
+        db_api.update_item(self.context, item)
+        items = db_api.get_public_items(self.context, 'fake')
+        self.assertThat(items, matchers.ListMatches([item]))
+
+        item['is_public'] = False
+        db_api.update_item(self.context, item)
+        self.assertEqual([], db_api.get_public_items(self.context, 'fake'))
+
     def test_add_tags(self):
         item1_id = fakes.random_ec2_id('fake')
         item2_id = fakes.random_ec2_id('fake')
@@ -340,6 +387,34 @@ class DbApiTestCase(test_base.BaseTestCase):
                                               tag3_1, tag3_3],
                                              orderless_lists=True))
 
+    def test_add_tags_duplicated_keys(self):
+        item_id = fakes.random_ec2_id('fake')
+        db_api.add_tags(self.context, [{'item_id': item_id,
+                                        'key': 'key1',
+                                        'value': 'val1'}])
+        db_api.add_tags(self.context, [{'item_id': item_id,
+                                        'key': 'key1',
+                                        'value': 'val1_1'},
+                                       {'item_id': item_id,
+                                        'key': 'key2',
+                                        'value': 'val2'},
+                                       {'item_id': item_id,
+                                        'key': 'key1',
+                                        'value': 'val1_2'},
+                                       {'item_id': item_id,
+                                        'key': 'key2',
+                                        'value': 'val2_1'}])
+        tags = db_api.get_tags(self.context)
+        self.assertThat(tags,
+                        matchers.ListMatches([{'item_id': item_id,
+                                               'key': 'key1',
+                                               'value': 'val1_2'},
+                                              {'item_id': item_id,
+                                               'key': 'key2',
+                                               'value': 'val2_1'}],
+                                             orderless_lists=True))
+        db_api.add_tags(self.context, [])
+
     def test_add_tags_isolation(self):
         item_id = fakes.random_ec2_id('fake')
         tag1 = {'item_id': item_id,
@@ -459,3 +534,142 @@ class DbApiTestCase(test_base.BaseTestCase):
         db_api.delete_tags(self.context, item_id)
         self.assertThat(db_api.get_tags(self.other_context),
                         matchers.ListMatches([tag2]))
+
+
+class ItemCacheTestCase(test_base.BaseTestCase):
+
+    def setUp(self):
+        super(ItemCacheTestCase, self).setUp()
+        db_api_patcher = mock.patch('ec2api.db.api.IMPL')
+        self.db_api = db_api_patcher.start()
+        self.addCleanup(db_api_patcher.stop)
+        self.context = ec2_context.RequestContext(fakes.ID_OS_USER,
+                                                  fakes.ID_OS_PROJECT)
+        self.context.item_cache = db_api.ItemCache()
+
+    def test_get_item_by_id(self):
+        item = {'id': 'fake-00000001', 'key': 'val'}
+        self.db_api.get_item_by_id.return_value = copy.deepcopy(item)
+
+        self.assertEqual(item,
+                         db_api.get_item_by_id(self.context, item['id']))
+        cached_item = db_api.get_item_by_id(self.context, item['id'])
+        self.assertEqual(item, cached_item)
+        self.db_api.get_item_by_id.assert_called_once_with(self.context,
+                                                           item['id'])
+
+        # NOTE(ft): modification of a returned item doesn't affect the cache
+        cached_item['key'] = 'val1'
+        self.assertEqual(item,
+                         db_api.get_item_by_id(self.context, item['id']))
+
+        item['key'] = 'val2'
+        db_api.update_item(self.context, item)
+        self.assertEqual(item,
+                         db_api.get_item_by_id(self.context, item['id']))
+        self.assertEqual(1, self.db_api.get_item_by_id.call_count)
+
+        db_api.delete_item(self.context, item['id'])
+        self.db_api.get_item_by_id.return_value = None
+        self.assertIsNone(db_api.get_item_by_id(self.context, item['id']))
+        self.assertEqual(2, self.db_api.get_item_by_id.call_count)
+
+    def test_get_items(self):
+        item1 = {'id': 'fake-00000001'}
+        item2 = {'id': 'fake-00000002'}
+        self.db_api.get_items.return_value = [item1]
+
+        self.assertEqual([item1], db_api.get_items(self.context, 'fake'))
+        self.assertEqual([item1], db_api.get_items(self.context, 'fake'))
+        self.assertEqual(1, self.db_api.get_items.call_count)
+        self.assertEqual([item1],
+                         db_api.get_items_by_ids(self.context, [item1['id']]))
+        self.assertFalse(self.db_api.get_items_by_ids.called)
+        self.assertEqual(item1,
+                         db_api.get_item_by_id(self.context, item1['id']))
+        self.assertFalse(self.db_api.get_item_by_id.called)
+
+        self.db_api.add_item.return_value = item2
+        db_api.add_item(self.context, 'fake', {})
+        self.db_api.get_items.return_value = [item1, item2]
+        self.assertEqual([item1, item2],
+                         db_api.get_items(self.context, 'fake'))
+        self.assertEqual(2, self.db_api.get_items.call_count)
+
+        self.db_api.get_items_by_ids.return_value = []
+        self.assertThat(
+            db_api.get_items_by_ids(self.context,
+                                    [item1['id'], 'fake-00000003']),
+            matchers.ListMatches([item1]))
+        self.db_api.get_items_by_ids.assert_called_once_with(
+            self.context, set(['fake-00000003']))
+
+
+class ItemDataTestCase(test_base.BaseTestCase):
+
+    def setUp(self):
+        super(ItemDataTestCase, self).setUp()
+        self.conf = self.useFixture(config_fixture.Config())
+        self.addCleanup(setattr, session, '_json', None)
+        session._json = None
+
+    def test_pack_unpack_item_data(self):
+        self.conf.config(item_data_json_modules=['fake_json_module', 'json'],
+                         group='database')
+        item = {'id': fakes.random_ec2_id('fake'),
+                'os_id': fakes.random_os_id(),
+                'vpc_id': None,
+                'is_public': True,
+                'dict_attr': {'key': 'val'}}
+        item_data = session._pack_item_data(item)
+        self.assertEqual('json', session._json.__name__)
+        self.assertEqual(item['os_id'], item_data['os_id'])
+        self.assertTrue(item_data['is_public'])
+        self.assertIn('id', item)
+
+        item_ref = mock.Mock(id=item['id'], **item_data)
+        self.assertThat(session._unpack_item_data(item_ref),
+                        matchers.DictMatches(item))
+
+    def test_unpack_item_data_default_types(self):
+        item_data = session._pack_item_data({'id': 'fake-00000001',
+                                             'os_id': None,
+                                             'vpc_id': None,
+                                             'attr': 'val'})
+        self.assertEqual('json', session._json.__name__)
+        item_ref = mock.Mock(id='fake-00000001', **item_data)
+        self.assertIsInstance(session._unpack_item_data(item_ref)['attr'],
+                              six.text_type)
+
+
+class ReadReplicaTestCase(test_base.BaseTestCase):
+
+    def setUp(self):
+        super(ReadReplicaTestCase, self).setUp()
+        self.context = ec2_context.RequestContext(fakes.ID_OS_USER,
+                                                  fakes.ID_OS_PROJECT)
+
+    @mock.patch('ec2api.db.sqlalchemy.api.get_session')
+    def test_read_from_replica(self, get_session):
+        query = get_session.return_value.query.return_value
+        query.filter_by.return_value.all.return_value = []
+        session.get_items(self.context, 'fake')
+        get_session.assert_called_once_with(use_slave=False)
+
+        get_session.reset_mock()
+        self.context.read_from_replica = True
+        session.get_items(self.context, 'fake')
+        get_session.assert_called_once_with(use_slave=True)
+
+    @mock.patch('ec2api.db.api.IMPL')
+    def test_read_your_writes(self, db_impl):
+        self.context.read_from_replica = True
+        db_api.get_items(self.context, 'fake')
+        self.assertTrue(self.context.read_from_replica)
+
+        db_api.update_item(self.context, {'id': 'fake-00000001'})
+        self.assertFalse(self.context.read_from_replica)
+
+        self.context.read_from_replica = True
+        db_api.read_from_primary(self.context)
+        self.assertFalse(self.context.read_from_replica)
@@ -739,6 +739,10 @@ class InstanceTestCase(base.ApiTestCase):
             mock.ANY, set([fakes.ID_EC2_INSTANCE_1]))
         (self.network_interface_api.describe_network_interfaces.
          assert_called_with(mock.ANY))
+        # NOTE(ft): only the requested instance is got from Nova
+        self.nova_admin.servers.get.assert_called_once_with(
+            fakes.ID_OS_INSTANCE_1)
+        self.assertEqual(1, self.nova_admin.servers.list.call_count)
 
         self.check_filtering(
             'DescribeInstances', 'reservationSet',
@@ -956,6 +960,44 @@ class InstanceTestCase(base.ApiTestCase):
             {'InstanceId.1': fakes.ID_EC2_INSTANCE_2,
              'InstanceId.2': fakes.random_ec2_id('i')})
 
+    def test_describe_instances_search_opts(self):
+        describer = instance_api.InstanceDescriber()
+        describer.filter = [{'name': 'availability-zone',
+                             'value': ['fake_zone']},
+                            {'name': 'instance-state-name',
+                             'value': ['running']}]
+        self.assertEqual({'availability_zone': 'fake_zone',
+                          'vm_state': 'active'},
+                         describer.get_os_servers_search_opts())
+
+        # NOTE(ft): several values, several vm states of a state name,
+        # and wildcards are not passed to Nova
+        describer.filter = [{'name': 'availability-zone',
+                             'value': ['fake_zone', 'other_zone']},
+                            {'name': 'instance-state-name',
+                             'value': ['pending']},
+                            {'name': 'instance-type',
+                             'value': ['m1.small']}]
+        self.assertEqual({}, describer.get_os_servers_search_opts())
+        describer.filter = [{'name': 'instance-state-name',
+                             'value': ['run*']}]
+        self.assertEqual({}, describer.get_os_servers_search_opts())
+
+        # NOTE(ft): not mapped vm states are described as they are
+        describer.filter = [{'name': 'instance-state-name',
+                             'value': ['stopped', 'error']}]
+        self.assertEqual({}, describer.get_os_servers_search_opts())
+        describer.filter = [{'name': 'instance-state-name',
+                             'value': ['error']}]
+        self.assertEqual({'vm_state': 'error'},
+                         describer.get_os_servers_search_opts())
+
+        describer.filter = [{'name': 'availability-zone',
+                             'value': ['fake_zone']},
+                            {'name': 'availability-zone',
+                             'value': ['other_zone']}]
+        self.assertIsNone(describer.get_os_servers_search_opts())
+
     def test_describe_instance_attributes(self):
         self.set_mock_db_items(fakes.DB_INSTANCE_1, fakes.DB_INSTANCE_2,
                                fakes.DB_IMAGE_ARI_1, fakes.DB_IMAGE_AKI_1,
@@ -1528,8 +1570,8 @@ class InstancePrivateTestCase(test_base.BaseTestCase):
 
         result = {}
         with mock.patch('ec2api.db.api.IMPL') as db_api:
-            db_api.get_items.return_value = [{'id': 'vol-00000015',
-                                              'os_id': '21'}]
+            db_api.get_item_by_os_id.return_value = {'id': 'vol-00000015',
+                                                     'os_id': '21'}
             instance_api._cloud_format_instance_bdm(
                 fake_context, os_instance_2, result)
         self.assertThat(
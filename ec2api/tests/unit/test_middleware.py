@@ -48,6 +48,7 @@ class ExecutorTestCase(test_base.BaseTestCase):
             pass
         fake_ec2_request = Fake()
         fake_ec2_request.invoke = invoke
+        fake_ec2_request.action = 'FakeAction'
 
         fake_wsgi_request = Fake()
 
@@ -138,7 +139,8 @@ class KeystoneAuthTestCase(test_base.BaseTestCase):
         resp = self.kauth(req)
         self._validate_ec2_error(resp, 400, 'AuthFailure')
 
-    @mock.patch.object(requests, 'request', return_value=FakeResponse())
+    @mock.patch.object(requests.Session, 'request',
+                       return_value=FakeResponse())
     def test_communication_failure(self, mock_request):
         req = wsgi.Request.blank('/test')
         req.GET['Signature'] = 'test-signature'
@@ -148,10 +150,11 @@ class KeystoneAuthTestCase(test_base.BaseTestCase):
         mock_request.assert_called_with('POST',
                                         CONF.keystone_url + '/ec2tokens',
                                         data=mock.ANY, headers=mock.ANY,
-                                        verify=True)
+                                        verify=True, timeout=mock.ANY)
 
     @tools.screen_all_logs
-    @mock.patch.object(requests, 'request', return_value=FakeResponse(200))
+    @mock.patch.object(requests.Session, 'request',
+                       return_value=FakeResponse(200))
     def test_no_result_data(self, mock_request):
         req = wsgi.Request.blank('/test')
         req.GET['Signature'] = 'test-signature'
@@ -161,4 +164,51 @@ class KeystoneAuthTestCase(test_base.BaseTestCase):
         mock_request.assert_called_with('POST',
                                         CONF.keystone_url + '/ec2tokens',
                                         data=mock.ANY, headers=mock.ANY,
-                                        verify=True)
+                                        verify=True, timeout=mock.ANY)
+
+    @mock.patch.object(requests.Session, 'request')
+    def test_validation_result_cache(self, mock_request):
+        response = FakeResponse(200)
+        response.json = mock.Mock(return_value={'user_id': 'fake_user',
+                                                'account_id': 'fake_account',
+                                                'token_id': 'fake_token'})
+        mock_request.return_value = response
+
+        def do_request(signature='test-signature', **params):
+            req = wsgi.Request.blank('/test')
+            req.GET['Signature'] = signature
+            req.GET['JCSAccessKeyId'] = 'test-key-id'
+            req.GET['Action'] = 'DescribeAddresses'
+            req.GET.update(params)
+            self.kauth(req)
+            return req.environ['ec2api.context']
+
+        ctxt = do_request()
+        self.assertEqual('fake_user', ctxt.user_id)
+        self.assertEqual('fake_account', ctxt.project_id)
+        self.assertEqual(1, mock_request.call_count)
+
+        ctxt = do_request()
+        self.assertEqual('fake_user', ctxt.user_id)
+        self.assertEqual('fake_token', ctxt.auth_token)
+        self.assertEqual(1, mock_request.call_count)
+
+        do_request(signature='other-signature')
+        self.assertEqual(2, mock_request.call_count)
+        self.assertEqual({'size': 2, 'hits': 1, 'misses': 2},
+                         self.kauth._cache.stats())
+
+        # NOTE(ft): the same signature with another param is not verified
+        do_request(**{'Filter.1.Name': 'domain'})
+        self.assertEqual(3, mock_request.call_count)
+
+    @mock.patch('os.getpid')
+    def test_iam_session(self, getpid):
+        getpid.return_value = 1
+        session = ec2._get_iam_session()
+        self.assertIs(session, ec2._get_iam_session())
+        adapter = session.get_adapter('https://iam')
+        self.assertEqual(CONF.iam_pool_size, adapter._pool_maxsize)
+
+        getpid.return_value = 2
+        self.assertIsNot(session, ec2._get_iam_session())
@@ -353,7 +353,7 @@ class NetworkInterfaceTestCase(base.ApiTestCase):
             fakes.DB_NETWORK_INTERFACE_1, fakes.DB_NETWORK_INTERFACE_2,
             fakes.DB_ADDRESS_1, fakes.DB_ADDRESS_2,
             fakes.DB_INSTANCE_1, fakes.DB_INSTANCE_2,
-            fakes.DB_SECURITY_GROUP_1)
+            fakes.DB_SECURITY_GROUP_1, fakes.DB_SUBNET_1, fakes.DB_SUBNET_2)
         self.neutron.list_ports.return_value = (
             {'ports': [fakes.OS_PORT_1, fakes.OS_PORT_2]})
         self.neutron.list_floatingips.return_value = (
@@ -416,6 +416,33 @@ class NetworkInterfaceTestCase(base.ApiTestCase):
             'DescribeNetworkInterfaces', 'networkInterfaceSet',
             fakes.ID_EC2_NETWORK_INTERFACE_1, 'networkInterfaceId')
 
+    def test_describe_network_interfaces_filter_pushdown(self):
+        self.set_mock_db_items(
+            fakes.DB_NETWORK_INTERFACE_2, fakes.DB_SECURITY_GROUP_1,
+            fakes.DB_SUBNET_1, fakes.DB_SUBNET_2)
+        self.neutron.list_ports.return_value = {'ports': [fakes.OS_PORT_2]}
+        self.neutron.list_floatingips.return_value = {'floatingips': []}
+        self.neutron.list_security_groups.return_value = (
+            {'security_groups': [copy.deepcopy(fakes.OS_SECURITY_GROUP_1)]})
+
+        self.execute('DescribeNetworkInterfaces',
+                     {'Filter.1.Name': 'subnet-id',
+                      'Filter.1.Value.1': fakes.ID_EC2_SUBNET_2,
+                      'Filter.2.Name': 'private-ip-address',
+                      'Filter.2.Value.1': fakes.IP_NETWORK_INTERFACE_2})
+        self.neutron.list_ports.assert_any_call(
+            tenant_id=fakes.ID_OS_PROJECT,
+            fixed_ips=['subnet_id=%s' % fakes.ID_OS_SUBNET_2,
+                       'ip_address=%s' % fakes.IP_NETWORK_INTERFACE_2])
+
+        self.neutron.list_ports.reset_mock()
+        resp = self.execute('DescribeNetworkInterfaces',
+                            {'Filter.1.Name': 'vpc-id',
+                             'Filter.1.Value.1': fakes.ID_EC2_VPC_2})
+        self.assertEqual([], resp['networkInterfaceSet'])
+        for call in self.neutron.list_ports.mock_calls:
+            self.assertNotIn('fixed_ips', call[2])
+
     def test_describe_network_interface_attribute(self):
         self.set_mock_db_items(fakes.DB_NETWORK_INTERFACE_1)
 
@@ -489,11 +516,14 @@ class NetworkInterfaceTestCase(base.ApiTestCase):
              'Attachment.DeleteOnTermination': 'True'})
 
     def test_reset_network_interface_attribute(self):
+        self.set_mock_db_items(fakes.DB_NETWORK_INTERFACE_1)
         self.execute(
             'ResetNetworkInterfaceAttribute',
             {'NetworkInterfaceId':
              fakes.ID_EC2_NETWORK_INTERFACE_1,
              'Attribute': 'sourceDestCheck'})
+        self.neutron.update_port.assert_called_once_with(
+            fakes.ID_OS_PORT_1, {'port': {'allowed_address_pairs': []}})
 
     def test_attach_network_interface(self):
         self.set_mock_db_items(fakes.DB_NETWORK_INTERFACE_1,
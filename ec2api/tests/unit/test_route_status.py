@@ -0,0 +1,197 @@
+# Copyright 2014
+# The Cloudscaling Group, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import socket
+
+import mock
+from oslo_config import fixture as config_fixture
+from oslotest import base as test_base
+import paramiko
+
+from ec2api.api import route_status
+
+
+ROUTER_OUTPUT = [
+    '0.0.0.0/0 (1 entry, 1 announced)\n',
+    '198.51.100.0/24 (1 entry, 1 announced)\n',
+    '198.51.100.7/32 (1 entry, 1 announced)\n',
+    '                Protocol next hop: 10.0.0.1\n',
+    '198.51.100.8/32 (2 entries, 1 announced)\n',
+    '                Protocol next hop: 10.0.0.2\n',
+    '                Protocol next hop: 10.0.0.3\n',
+    '203.0.113.0/24 (1 entry, 1 announced)\n',
+    '                Protocol next hop: 10.0.0.4\n',
+]
+
+
+class RouteStatusTestCase(test_base.BaseTestCase):
+
+    def setUp(self):
+        super(RouteStatusTestCase, self).setUp()
+        conf = self.useFixture(config_fixture.Config())
+        conf.config(router_floating_ip_range='198.51.100.0/23',
+                    router_routes_poll_interval=0,
+                    router_routes_max_age=60)
+        route_status._index = route_status.RouteIndex()
+
+        command_patcher = mock.patch(
+            'ec2api.api.route_status._run_router_command')
+        self.run_command = command_patcher.start()
+        self.addCleanup(command_patcher.stop)
+
+        time_patcher = mock.patch('time.time', return_value=1000)
+        self.time = time_patcher.start()
+        self.addCleanup(time_patcher.stop)
+
+    def test_parse_routes(self):
+        routes = route_status.parse_routes(ROUTER_OUTPUT)
+        self.assertEqual(
+            {'0.0.0.0/0': None,
+             '198.51.100.0/24': None,
+             '198.51.100.7/32': '10.0.0.1',
+             '198.51.100.8/32': '10.0.0.2',
+             '203.0.113.0/24': '10.0.0.4'},
+            dict((str(net), next_hop) for net, next_hop in routes.items()))
+
+    def test_get_status(self):
+        self.run_command.return_value = ROUTER_OUTPUT
+        self.assertEqual('active', route_status.get_status('198.51.100.7'))
+        self.assertEqual('active', route_status.get_status('198.51.100.8'))
+        self.assertEqual('pending', route_status.get_status('198.51.100.9'))
+        self.assertEqual('active', route_status.get_status('203.0.113.5'))
+        self.assertEqual('pending', route_status.get_status('192.0.2.1'))
+        # NOTE(ft): the whole route table is got once
+        self.run_command.assert_called_once_with(
+            'show route 198.51.100.0/23 orlonger detail | '
+            'grep -E "^[0-9]|Protocol next hop"')
+
+        # NOTE(ft): the route table is got again when it is outdated
+        self.time.return_value = 1060
+        route_status.get_status('198.51.100.7')
+        self.assertEqual(2, self.run_command.call_count)
+
+    def test_get_statuses(self):
+        self.run_command.return_value = ROUTER_OUTPUT
+        self.assertEqual({}, route_status.get_statuses(set()))
+        self.assertFalse(self.run_command.called)
+
+        self.assertEqual(
+            {'198.51.100.7': 'active',
+             '198.51.100.9': 'pending',
+             '203.0.113.5': 'active'},
+            route_status.get_statuses(['198.51.100.7', '198.51.100.9',
+                                       '203.0.113.5']))
+        self.run_command.assert_called_once_with(
+            'show route 198.51.100.0/23 orlonger detail | '
+            'grep -E "^[0-9]|Protocol next hop"')
+
+    def test_get_statuses_without_floating_ip_range(self):
+        self.useFixture(config_fixture.Config()).config(
+            router_floating_ip_range='')
+        self.run_command.side_effect = [
+            ['                Protocol next hop: 10.0.0.1\n'], []]
+        self.assertEqual(
+            {'198.51.100.7': 'active',
+             '198.51.100.9': 'pending'},
+            route_status.get_statuses(['198.51.100.7', '198.51.100.9']))
+        self.run_command.assert_has_calls(
+            [mock.call('show route 198.51.100.7 detail | '
+                       'grep "Protocol next hop"'),
+             mock.call('show route 198.51.100.9 detail | '
+                       'grep "Protocol next hop"')],
+            any_order=True)
+        self.assertEqual(2, self.run_command.call_count)
+
+    def test_get_status_force_refresh(self):
+        self.run_command.return_value = ROUTER_OUTPUT
+        self.assertEqual('active', route_status.get_status('198.51.100.7'))
+
+        self.run_command.reset_mock()
+        self.run_command.return_value = []
+        self.time.return_value = 1001
+        self.assertEqual('pending',
+                         route_status.get_status('198.51.100.7',
+                                                 force_refresh=True))
+        self.run_command.assert_called_once_with(
+            'show route 198.51.100.7 detail | grep "Protocol next hop"')
+        # NOTE(ft): the live check overrides the index
+        self.assertEqual('pending', route_status.get_status('198.51.100.7'))
+        self.assertEqual(1, self.run_command.call_count)
+
+        self.assertRaises(Exception, route_status.get_status,
+                          '1.1.1.1; reboot', force_refresh=True)
+
+
+class RouterConnectionPoolTestCase(test_base.BaseTestCase):
+
+    def setUp(self):
+        super(RouterConnectionPoolTestCase, self).setUp()
+        conf = self.useFixture(config_fixture.Config())
+        conf.config(router_address='fake_router',
+                    router_user='fake_user',
+                    router_cred='fake_cred',
+                    router_ssh_keepalive=30,
+                    router_command_timeout=10)
+
+        client_patcher = mock.patch('paramiko.SSHClient')
+        self.client_class = client_patcher.start()
+        self.addCleanup(client_patcher.stop)
+        self.client_class.side_effect = self._create_client
+        self.clients = []
+
+    def _create_client(self):
+        client = mock.Mock()
+        client.exec_command.return_value = (
+            mock.Mock(), mock.Mock(**{'readlines.return_value': ['line']}),
+            mock.Mock())
+        client.get_transport.return_value.is_active.return_value = True
+        self.clients.append(client)
+        return client
+
+    def test_run_command(self):
+        pool = route_status.RouterConnectionPool(2)
+        self.assertEqual(['line'], pool.run_command('command1'))
+        self.assertEqual(['line'], pool.run_command('command2'))
+
+        self.assertEqual(1, len(self.clients))
+        client = self.clients[0]
+        client.connect.assert_called_once_with(
+            'fake_router', username='fake_user', password='fake_cred',
+            timeout=10)
+        client.get_transport.return_value.set_keepalive.assert_called_with(
+            30)
+        client.exec_command.assert_called_with('command2', timeout=10)
+        self.assertFalse(client.close.called)
+
+    def test_run_command_reconnect(self):
+        pool = route_status.RouterConnectionPool(2)
+        pool.run_command('command')
+
+        # NOTE(ft): inactive session is reopened before run a command
+        self.clients[0].get_transport.return_value.is_active.return_value = (
+            False)
+        self.assertEqual(['line'], pool.run_command('command'))
+        self.assertEqual(2, len(self.clients))
+        self.clients[0].close.assert_called_once_with()
+
+        # NOTE(ft): silently dropped session is reopened
+        self.clients[1].exec_command.side_effect = paramiko.SSHException()
+        self.assertEqual(['line'], pool.run_command('command'))
+        self.assertEqual(3, len(self.clients))
+        self.clients[1].close.assert_called_once_with()
+
+        # NOTE(ft): command timeout is not retried
+        self.clients[2].exec_command.side_effect = socket.timeout()
+        self.assertRaises(socket.timeout, pool.run_command, 'command')
+        self.assertEqual(3, len(self.clients))
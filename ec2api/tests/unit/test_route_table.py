@@ -751,6 +751,21 @@ class RouteTableTestCase(base.ApiTestCase):
             fakes.ID_OS_SUBNET_1,
             {'subnet': {'host_routes': 'fake_previous_routes'}})
 
+    @mock.patch('ec2api.api.route_table._get_subnet_host_routes')
+    def test_update_subnet_host_routes_vpc_wide_subnet(self, routes_getter):
+        self.neutron.show_subnet.return_value = {
+            'subnet': tools.update_dict(fakes.OS_SUBNET_1,
+                                        {'cidr': fakes.CIDR_VPC_1})}
+        routes_getter.return_value = 'fake_routes'
+
+        route_table._update_subnet_host_routes(
+            self._create_context(), fakes.DB_SUBNET_1,
+            fakes.DB_ROUTE_TABLE_1, router_objects={'fake': 'objects'})
+
+        routes_getter.assert_called_once_with(
+            mock.ANY, fakes.DB_ROUTE_TABLE_1, '10.10.0.1',
+            {'fake': 'objects'}, False)
+
     @mock.patch('ec2api.api.route_table._get_router_objects')
     @mock.patch('ec2api.api.route_table._update_subnet_host_routes')
     def test_update_routes_in_associated_subnets(self, routes_updater,
@@ -67,6 +67,8 @@ class SecurityGroupTestCase(base.ApiTestCase):
             project_id=None)
         self.nova.security_groups.create.assert_called_once_with(
             'groupname', 'Group description')
+        self.neutron.list_security_groups.assert_called_once_with(
+            tenant_id=mock.ANY, name=['groupname'], fields=['id', 'name'])
 
     def test_create_security_group_invalid(self):
         security_group.security_group_engine = (
@@ -173,6 +175,33 @@ class SecurityGroupTestCase(base.ApiTestCase):
         self.neutron.delete_security_group.assert_called_once_with(
             fakes.ID_OS_SECURITY_GROUP_1)
 
+    def test_delete_security_group_duplicated_default(self):
+        security_group.security_group_engine = (
+            security_group.SecurityGroupEngineNeutron())
+        self.set_mock_db_items(
+            fakes.DB_SECURITY_GROUP_1,
+            tools.update_dict(fakes.DB_SECURITY_GROUP_2,
+                              {'vpc_id': fakes.ID_EC2_VPC_1}))
+        self.neutron.list_security_groups.return_value = (
+            {'security_groups': [
+                {'id': fakes.ID_OS_SECURITY_GROUP_1,
+                 'name': fakes.ID_EC2_VPC_1},
+                {'id': fakes.ID_OS_SECURITY_GROUP_2,
+                 'name': fakes.ID_EC2_VPC_1}]})
+
+        resp = self.execute(
+            'DeleteSecurityGroup',
+            {'GroupId': fakes.ID_EC2_SECURITY_GROUP_2})
+        self.assertEqual(True, resp['return'])
+        self.neutron.list_security_groups.assert_called_once_with(
+            tenant_id=mock.ANY, name=['default', fakes.ID_EC2_VPC_1],
+            fields=['id', 'name'])
+        self.assertFalse(self.neutron.show_security_group.called)
+        self.neutron.delete_security_group.assert_called_once_with(
+            fakes.ID_OS_SECURITY_GROUP_2)
+        self.db_api.delete_item.assert_called_once_with(
+            mock.ANY, fakes.ID_EC2_SECURITY_GROUP_2)
+
     def test_delete_security_group_nova(self):
         security_group.security_group_engine = (
             security_group.SecurityGroupEngineNova())
@@ -429,6 +458,115 @@ class SecurityGroupTestCase(base.ApiTestCase):
                  fakes.OS_SECURITY_GROUP_RULE_1, {'remote_ip_prefix': '::/0'},
                  {'id', 'remote_group_id', 'tenant_id'})})
 
+    def test_authorize_security_group_bulk(self):
+        security_group.security_group_engine = (
+            security_group.SecurityGroupEngineNeutron())
+        self.set_mock_db_items(fakes.DB_SECURITY_GROUP_1,
+                               fakes.DB_SECURITY_GROUP_2)
+        self.neutron.create_security_group_rule.return_value = (
+            {'security_group_rules': [fakes.OS_SECURITY_GROUP_RULE_1]})
+        self.execute(
+            'AuthorizeSecurityGroupIngress',
+            {'GroupId': fakes.ID_EC2_SECURITY_GROUP_2,
+             'IpPermissions.1.FromPort': '10',
+             'IpPermissions.1.ToPort': '10',
+             'IpPermissions.1.IpProtocol': 'tcp',
+             'IpPermissions.1.IpRanges.1.CidrIp': '192.168.1.0/24',
+             'IpPermissions.2.FromPort': '20',
+             'IpPermissions.2.ToPort': '20',
+             'IpPermissions.2.IpProtocol': 'tcp',
+             'IpPermissions.2.IpRanges.1.CidrIp': '10.0.0.0/8'})
+        self.neutron.create_security_group_rule.assert_called_once_with(
+            {'security_group_rules': [
+                tools.purge_dict(fakes.OS_SECURITY_GROUP_RULE_1,
+                                 {'id', 'remote_group_id', 'tenant_id'}),
+                tools.patch_dict(fakes.OS_SECURITY_GROUP_RULE_1,
+                                 {'port_range_min': 20,
+                                  'port_range_max': 20,
+                                  'remote_ip_prefix': '10.0.0.0/8'},
+                                 {'id', 'remote_group_id', 'tenant_id'})]})
+
+    def test_authorize_security_group_several_remotes(self):
+        security_group.security_group_engine = (
+            security_group.SecurityGroupEngineNeutron())
+        self.set_mock_db_items(fakes.DB_SECURITY_GROUP_1,
+                               fakes.DB_SECURITY_GROUP_2)
+        self.execute(
+            'AuthorizeSecurityGroupIngress',
+            {'GroupId': fakes.ID_EC2_SECURITY_GROUP_2,
+             'IpPermissions.1.FromPort': '10',
+             'IpPermissions.1.ToPort': '10',
+             'IpPermissions.1.IpProtocol': 'tcp',
+             'IpPermissions.1.Groups.1.GroupId': fakes.ID_EC2_SECURITY_GROUP_1,
+             'IpPermissions.1.IpRanges.1.CidrIp': '192.168.1.0/24',
+             'IpPermissions.1.IpRanges.2.CidrIp': '10.0.0.0/8'})
+        rule_body = tools.purge_dict(fakes.OS_SECURITY_GROUP_RULE_1,
+                                     {'id', 'remote_group_id',
+                                      'remote_ip_prefix'})
+        self.neutron.create_security_group_rule.assert_called_once_with(
+            {'security_group_rules': [
+                tools.update_dict(
+                    rule_body,
+                    {'remote_group_id': fakes.ID_OS_SECURITY_GROUP_1}),
+                tools.update_dict(rule_body,
+                                  {'remote_ip_prefix': '192.168.1.0/24'}),
+                tools.update_dict(rule_body,
+                                  {'remote_ip_prefix': '10.0.0.0/8'})]})
+
+    def test_format_security_group_several_remotes(self):
+        os_rule = tools.purge_dict(fakes.OS_SECURITY_GROUP_RULE_1, {'id'})
+        os_security_group = tools.update_dict(
+            fakes.OS_SECURITY_GROUP_2,
+            {'security_group_rules': [
+                os_rule,
+                tools.update_dict(os_rule,
+                                  {'remote_ip_prefix': None,
+                                   'remote_group_id':
+                                   fakes.ID_OS_SECURITY_GROUP_1}),
+                tools.update_dict(os_rule,
+                                  {'remote_ip_prefix': '10.0.0.0/8'}),
+                tools.update_dict(os_rule, {'port_range_max': 20})]})
+
+        ec2_security_group = security_group._format_security_group(
+            fakes.DB_SECURITY_GROUP_2, os_security_group,
+            {fakes.ID_OS_SECURITY_GROUP_1: fakes.DB_SECURITY_GROUP_1},
+            {fakes.ID_OS_SECURITY_GROUP_1: fakes.OS_SECURITY_GROUP_1})
+        self.assertEqual(
+            [{'ipProtocol': 'tcp', 'fromPort': 10, 'toPort': 10,
+              'ipRanges': [{'cidrIp': '192.168.1.0/24'},
+                           {'cidrIp': '10.0.0.0/8'}],
+              'groups': [{'groupId': fakes.ID_EC2_SECURITY_GROUP_1,
+                          'groupName': fakes.ID_EC2_VPC_1,
+                          'userId': fakes.ID_OS_PROJECT}]},
+             {'ipProtocol': 'tcp', 'fromPort': 10, 'toPort': 20,
+              'ipRanges': [{'cidrIp': '192.168.1.0/24'}]}],
+            ec2_security_group['ipPermissions'])
+
+    @tools.screen_unexpected_exception_logs
+    def test_authorize_security_group_rollback_nova(self):
+        security_group.security_group_engine = (
+            security_group.SecurityGroupEngineNova())
+        self.nova.security_groups.list.return_value = (
+            [fakes.NovaSecurityGroup(fakes.NOVA_SECURITY_GROUP_1),
+             fakes.NovaSecurityGroup(fakes.NOVA_SECURITY_GROUP_2)])
+        os_rule = mock.Mock()
+        self.nova.security_group_rules.create.side_effect = [
+            os_rule, nova_exception.OverLimit(413)]
+        self.assert_execution_error(
+            'RulesPerSecurityGroupLimitExceeded',
+            'AuthorizeSecurityGroupIngress',
+            {'GroupName': fakes.EC2_NOVA_SECURITY_GROUP_2['groupName'],
+             'IpPermissions.1.FromPort': '10',
+             'IpPermissions.1.ToPort': '10',
+             'IpPermissions.1.IpProtocol': 'tcp',
+             'IpPermissions.1.IpRanges.1.CidrIp': '192.168.1.0/24',
+             'IpPermissions.2.FromPort': '20',
+             'IpPermissions.2.ToPort': '20',
+             'IpPermissions.2.IpProtocol': 'tcp',
+             'IpPermissions.2.IpRanges.1.CidrIp': '10.0.0.0/8'})
+        self.nova.security_group_rules.delete.assert_called_once_with(
+            os_rule)
+
     def test_authorize_security_group_ip_ranges_nova(self):
         security_group.security_group_engine = (
             security_group.SecurityGroupEngineNova())
@@ -506,6 +644,45 @@ class SecurityGroupTestCase(base.ApiTestCase):
         self.neutron.delete_security_group_rule.assert_called_once_with(
             fakes.OS_SECURITY_GROUP_RULE_1['id'])
 
+    @tools.screen_unexpected_exception_logs
+    def test_revoke_security_group_rollback(self):
+        security_group.security_group_engine = (
+            security_group.SecurityGroupEngineNeutron())
+        self.set_mock_db_items(fakes.DB_SECURITY_GROUP_1,
+                               fakes.DB_SECURITY_GROUP_2)
+        os_rule_2 = tools.update_dict(fakes.OS_SECURITY_GROUP_RULE_1,
+                                      {'id': fakes.random_os_id(),
+                                       'remote_ip_prefix': '10.0.0.0/8'})
+        self.neutron.show_security_group.return_value = {
+            'security_group': tools.update_dict(
+                fakes.OS_SECURITY_GROUP_2,
+                {'security_group_rules': [fakes.OS_SECURITY_GROUP_RULE_1,
+                                          fakes.OS_SECURITY_GROUP_RULE_2,
+                                          os_rule_2]})}
+
+        def delete_security_group_rule(os_id):
+            if os_id == os_rule_2['id']:
+                raise Exception()
+        self.neutron.delete_security_group_rule.side_effect = (
+            delete_security_group_rule)
+
+        self.assert_execution_error(
+            self.ANY_EXECUTE_ERROR, 'RevokeSecurityGroupIngress',
+            {'GroupId': fakes.ID_EC2_SECURITY_GROUP_2,
+             'IpPermissions.1.FromPort': '10',
+             'IpPermissions.1.ToPort': '10',
+             'IpPermissions.1.IpProtocol': 'tcp',
+             'IpPermissions.1.IpRanges.1.CidrIp': '192.168.1.0/24',
+             'IpPermissions.2.FromPort': '10',
+             'IpPermissions.2.ToPort': '10',
+             'IpPermissions.2.IpProtocol': 'tcp',
+             'IpPermissions.2.IpRanges.1.CidrIp': '10.0.0.0/8'})
+        self.assertEqual(2, self.neutron.delete_security_group_rule.call_count)
+        self.neutron.create_security_group_rule.assert_called_once_with(
+            {'security_group_rule':
+             tools.purge_dict(fakes.OS_SECURITY_GROUP_RULE_1,
+                              {'id', 'remote_group_id', 'tenant_id'})})
+
     def test_revoke_security_group_ingress_ip_ranges_nova(self):
         security_group.security_group_engine = (
             security_group.SecurityGroupEngineNova())
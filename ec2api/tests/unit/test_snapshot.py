@@ -35,7 +35,7 @@ class SnapshotTestCase(base.ApiTestCase):
             {'snapshotSet': [fakes.EC2_SNAPSHOT_1, fakes.EC2_SNAPSHOT_2]},
             orderless_lists=True))
 
-        self.db_api.get_items.assert_any_call(mock.ANY, 'vol')
+        self.db_api.get_project_items_ids.assert_any_call(mock.ANY, 'vol')
 
         self.db_api.get_items_by_ids = tools.CopyingMock(
             return_value=[fakes.DB_SNAPSHOT_1])
@@ -75,7 +75,7 @@ class SnapshotTestCase(base.ApiTestCase):
             {'snapshotSet': []},
             orderless_lists=True))
 
-        self.db_api.get_items.assert_any_call(mock.ANY, 'vol')
+        self.db_api.get_project_items_ids.assert_any_call(mock.ANY, 'vol')
         self.db_api.get_items.assert_any_call(mock.ANY, 'snap')
         self.db_api.delete_item.assert_any_call(mock.ANY,
                                                 fakes.ID_EC2_SNAPSHOT_1)
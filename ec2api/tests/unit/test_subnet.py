@@ -15,6 +15,7 @@
 import mock
 from neutronclient.common import exceptions as neutron_exception
 
+from ec2api.api import subnet as subnet_api
 from ec2api.tests.unit import base
 from ec2api.tests.unit import fakes
 from ec2api.tests.unit import matchers
@@ -255,6 +256,8 @@ class SubnetTestCase(base.ApiTestCase):
                         matchers.ListMatches([fakes.EC2_SUBNET_2]))
         self.db_api.get_items_by_ids.assert_called_once_with(
             mock.ANY, set([fakes.ID_EC2_SUBNET_2]))
+        self.neutron.list_subnets.assert_called_with(
+            id=[fakes.ID_OS_SUBNET_2])
 
         self.check_filtering(
             'DescribeSubnets', 'subnetSet',
@@ -271,6 +274,95 @@ class SubnetTestCase(base.ApiTestCase):
             'DescribeSubnets', 'subnetSet',
             fakes.ID_EC2_SUBNET_2, 'subnetId')
 
+    def test_describe_subnets_filter_pushdown(self):
+        self.set_mock_db_items(fakes.DB_SUBNET_1, fakes.DB_SUBNET_2)
+        self.neutron.list_subnets.return_value = (
+                {'subnets': [fakes.OS_SUBNET_2]})
+        self.neutron.list_networks.return_value = (
+                {'networks': [fakes.OS_NETWORK_2]})
+
+        resp = self.execute('DescribeSubnets',
+                            {'Filter.1.Name': 'subnet-id',
+                             'Filter.1.Value.1': fakes.ID_EC2_SUBNET_2})
+        self.assertEqual([fakes.ID_EC2_SUBNET_2],
+                         [s['subnetId'] for s in resp['subnetSet']])
+        self.neutron.list_subnets.assert_called_once_with(
+            id=[fakes.ID_OS_SUBNET_2])
+        self.neutron.list_networks.assert_called_once_with(
+            id=[fakes.ID_OS_NETWORK_2])
+        self.neutron.list_ports.assert_called_once_with(
+            tenant_id=fakes.ID_OS_PROJECT, network_id=[fakes.ID_OS_NETWORK_2])
+
+        self.neutron.reset_mock()
+        resp = self.execute('DescribeSubnets',
+                            {'Filter.1.Name': 'vpc-id',
+                             'Filter.1.Value.1': fakes.ID_EC2_VPC_2})
+        self.assertEqual([], resp['subnetSet'])
+        self.assertFalse(self.neutron.list_subnets.called)
+        self.assertFalse(self.neutron.list_ports.called)
+
+        # NOTE(ft): wildcard filters are not passed to Neutron
+        self.neutron.reset_mock()
+        self.execute('DescribeSubnets',
+                     {'Filter.1.Name': 'subnet-id',
+                      'Filter.1.Value.1': 'subnet-*'})
+        self.neutron.list_subnets.assert_called_once_with(
+            tenant_id=fakes.ID_OS_PROJECT)
+
+    def test_describe_subnets_available_ip_count(self):
+        self.set_mock_db_items(fakes.DB_VPC_1, fakes.DB_SUBNET_1,
+                               fakes.DB_SUBNET_2)
+        self.neutron.list_subnets.return_value = (
+                {'subnets': [fakes.OS_SUBNET_1, fakes.OS_SUBNET_2]})
+        self.neutron.list_networks.return_value = (
+                {'networks': [fakes.OS_NETWORK_1, fakes.OS_NETWORK_2]})
+        self.neutron.list_ports.return_value = {'ports': [
+            {'device_owner': 'network:dhcp',
+             'fixed_ips': [{'subnet_id': fakes.ID_OS_SUBNET_1},
+                           {'subnet_id': fakes.ID_OS_SUBNET_2}]},
+            {'device_owner': 'compute:nova',
+             'fixed_ips': [{'subnet_id': fakes.ID_OS_SUBNET_2},
+                           {'subnet_id': fakes.ID_OS_SUBNET_2}]},
+            {'device_owner': 'compute:nova',
+             'fixed_ips': []}]}
+
+        resp = self.execute('DescribeSubnets', {})
+        self.assertEqual(
+            {fakes.ID_EC2_SUBNET_1: 253, fakes.ID_EC2_SUBNET_2: 251},
+            dict((subnet['subnetId'], subnet['availableIpAddressCount'])
+                 for subnet in resp['subnetSet']))
+        # NOTE(ft): describe doesn't change OS subnets
+        self.assertFalse(self.neutron.update_subnet.called)
+
+    @mock.patch('ec2api.api.route_table._update_subnet_host_routes')
+    def test_reconcile_host_routes(self, update_host_routes):
+        subnet_3 = tools.update_dict(fakes.DB_SUBNET_2,
+                                     {'id': fakes.random_ec2_id('subnet'),
+                                      'host_routes_reconciled': True})
+        self.set_mock_db_items(fakes.DB_VPC_1, fakes.DB_ROUTE_TABLE_1,
+                               fakes.DB_ROUTE_TABLE_3, fakes.DB_SUBNET_1,
+                               fakes.DB_SUBNET_2, subnet_3)
+        self.neutron.show_subnet.side_effect = tools.get_by_1st_arg_getter({
+            fakes.ID_OS_SUBNET_1: {'subnet': fakes.OS_SUBNET_1},
+            fakes.ID_OS_SUBNET_2: {'subnet': tools.update_dict(
+                fakes.OS_SUBNET_2, {'cidr': fakes.CIDR_VPC_1})}})
+
+        self.assertEqual(
+            1, subnet_api.reconcile_host_routes(self._create_context()))
+        # NOTE(ft): the subnet is flagged after its host routes are updated,
+        # so the mock sees the flagged subnet
+        update_host_routes.assert_called_once_with(
+            mock.ANY, mock.ANY, fakes.DB_ROUTE_TABLE_3,
+            neutron=self.neutron, add_vpc_route=False)
+        self.assertEqual(fakes.ID_EC2_SUBNET_2,
+                         update_host_routes.call_args[0][1]['id'])
+        self.assertEqual(2, self.neutron.show_subnet.call_count)
+        self.assertEqual(2, self.db_api.update_item.call_count)
+        for subnet in (fakes.DB_SUBNET_1, fakes.DB_SUBNET_2):
+            self.db_api.update_item.assert_any_call(
+                mock.ANY, tools.update_dict(subnet,
+                                            {'host_routes_reconciled': True}))
+
     def test_describe_subnets_not_consistent_os_subnet(self):
         self.set_mock_db_items(fakes.DB_SUBNET_1, fakes.DB_SUBNET_2)
         self.neutron.list_subnets.return_value = (
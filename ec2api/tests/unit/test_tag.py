@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
+import json
+
 import mock
 
 from ec2api.api import ec2utils
@@ -202,3 +205,42 @@ class TagTestCase(base.ApiTestCase):
                                           'key': 'fake-key',
                                           'value': 'fake-value'}]},
                              resp)
+
+    def test_describe_tags_paging(self):
+        tag1 = {'item_id': fakes.ID_EC2_VPC_1,
+                'key': 'key1',
+                'value': 'value1'}
+        tag2 = {'item_id': fakes.ID_EC2_VPC_2,
+                'key': 'key1',
+                'value': 'value2'}
+        tag3 = {'item_id': fakes.ID_EC2_VPC_2,
+                'key': 'key2',
+                'value': 'value3'}
+        self.db_api.get_tags.return_value = [tag1, tag2, tag3]
+        resp = self.execute('DescribeTags', {'MaxResults': '2'})
+        self.assertEqual([fakes.ID_EC2_VPC_1, fakes.ID_EC2_VPC_2],
+                         [t['resourceId'] for t in resp['tagSet']])
+        self.assertIn('nextToken', resp)
+        self.db_api.get_tags.assert_called_once_with(
+            mock.ANY, None, None, marker=None, limit=3)
+
+        self.db_api.get_tags.reset_mock()
+        self.db_api.get_tags.return_value = [tag3]
+        resp = self.execute('DescribeTags',
+                            {'MaxResults': '2',
+                             'NextToken': resp['nextToken']})
+        self.assertEqual([fakes.ID_EC2_VPC_2],
+                         [t['resourceId'] for t in resp['tagSet']])
+        self.assertNotIn('nextToken', resp)
+        self.db_api.get_tags.assert_called_once_with(
+            mock.ANY, None, None, marker=[fakes.ID_EC2_VPC_2, 'key1'],
+            limit=3)
+
+        self.assert_execution_error('InvalidParameterValue', 'DescribeTags',
+                                    {'NextToken': 'fake'})
+        for marker in ('vpc-1', ['vpc-1'], ['vpc-1', 1]):
+            self.assert_execution_error(
+                'InvalidParameterValue', 'DescribeTags',
+                {'NextToken': base64.urlsafe_b64encode(json.dumps(marker))})
+        self.assert_execution_error('InvalidParameterValue', 'DescribeTags',
+                                    {'MaxResults': '0'})
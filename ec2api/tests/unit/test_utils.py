@@ -0,0 +1,66 @@
+# Copyright 2014
+# The Cloudscaling Group, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+import testtools
+
+from ec2api import utils
+
+
+class TTLCacheTestCase(testtools.TestCase):
+
+    def setUp(self):
+        super(TTLCacheTestCase, self).setUp()
+        self.timer = mock.Mock(return_value=1000)
+
+    def test_expiration(self):
+        cache = utils.TTLCache(10, 60, timer=self.timer)
+        cache.set('key', 'value')
+        self.assertEqual('value', cache.get('key'))
+
+        self.timer.return_value = 1059
+        self.assertEqual('value', cache.get('key'))
+
+        self.timer.return_value = 1060
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(0, len(cache))
+        self.assertEqual({'size': 0, 'hits': 2, 'misses': 1}, cache.stats())
+
+    def test_lru_eviction(self):
+        cache = utils.TTLCache(2, 60, timer=self.timer)
+        cache.set('key1', 'value1')
+        cache.set('key2', 'value2')
+        cache.get('key1')
+        cache.set('key3', 'value3')
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get('key2'))
+        self.assertEqual('value1', cache.get('key1'))
+        self.assertEqual('value3', cache.get('key3'))
+
+    def test_disabled(self):
+        cache = utils.TTLCache(10, 0, timer=self.timer)
+        cache.set('key', 'value')
+        self.assertIsNone(cache.get('key'))
+        cache = utils.TTLCache(0, 60, timer=self.timer)
+        cache.set('key', 'value')
+        self.assertIsNone(cache.get('key'))
+
+    def test_pop_and_clear(self):
+        cache = utils.TTLCache(10, 60, timer=self.timer)
+        cache.set('key1', 'value1')
+        cache.set('key2', 'value2')
+        self.assertEqual('value1', cache.pop('key1'))
+        self.assertIsNone(cache.pop('key1'))
+        cache.clear()
+        self.assertEqual(0, len(cache))
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
+import json
+
 import mock
 
 from ec2api.tests.unit import base
@@ -71,6 +74,39 @@ class VolumeTestCase(base.ApiTestCase):
             'DescribeVolumes', 'volumeSet',
             fakes.ID_EC2_VOLUME_1, 'volumeId')
 
+    def test_describe_volumes_paging(self):
+        self.cinder.volumes.list.return_value = [
+            fakes.OSVolume(fakes.OS_VOLUME_1),
+            fakes.OSVolume(fakes.OS_VOLUME_2),
+            fakes.OSVolume(fakes.OS_VOLUME_3)]
+        self.set_mock_db_items(fakes.DB_VOLUME_1, fakes.DB_VOLUME_2,
+                               fakes.DB_VOLUME_3, fakes.DB_INSTANCE_1,
+                               fakes.DB_INSTANCE_2, fakes.DB_SNAPSHOT_1,
+                               fakes.DB_SNAPSHOT_2)
+        volume_ids = sorted([fakes.ID_EC2_VOLUME_1, fakes.ID_EC2_VOLUME_2,
+                             fakes.ID_EC2_VOLUME_3])
+
+        resp = self.execute('DescribeVolumes', {'MaxResults': '2'})
+        self.assertEqual(volume_ids[:2],
+                         [v['volumeId'] for v in resp['volumeSet']])
+        self.assertIn('nextToken', resp)
+
+        resp = self.execute('DescribeVolumes',
+                            {'MaxResults': '2',
+                             'NextToken': resp['nextToken']})
+        self.assertEqual(volume_ids[2:],
+                         [v['volumeId'] for v in resp['volumeSet']])
+        self.assertNotIn('nextToken', resp)
+
+        # NOTE(ft): a tampered token of valid JSON is rejected as well
+        for marker in (1, ['vol-1'], {'id': 'vol-1'}):
+            self.assert_execution_error(
+                'InvalidParameterValue', 'DescribeVolumes',
+                {'MaxResults': '2',
+                 'NextToken': base64.urlsafe_b64encode(json.dumps(marker))})
+        self.assert_execution_error('InvalidParameterValue',
+                                    'DescribeVolumes', {'NextToken': 'fake'})
+
     def test_describe_volumes_auto_remove(self):
         self.cinder.volumes.list.return_value = []
         self.set_mock_db_items(fakes.DB_VOLUME_1, fakes.DB_VOLUME_2)
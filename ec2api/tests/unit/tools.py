@@ -94,6 +94,28 @@ def get_db_api_get_items_by_ids(*items):
     return db_api_get_items_by_ids
 
 
+def get_db_api_get_item_by_os_id(*items):
+    """Generate db_api.get_item_by_os_id mock function."""
+
+    def db_api_get_item_by_os_id(context, kind, os_id):
+        return next((copy.deepcopy(item)
+                     for item in items
+                     if (ec2utils.get_ec2_id_kind(item['id']) == kind and
+                         item['os_id'] == os_id)),
+                    None)
+    return db_api_get_item_by_os_id
+
+
+def get_db_api_get_project_items_ids(*items):
+    """Generate db_api.get_project_items_ids mock function."""
+
+    def db_api_get_project_items_ids(context, kind):
+        return [{'id': item['id'], 'os_id': item['os_id']}
+                for item in items
+                if ec2utils.get_ec2_id_kind(item['id']) == kind]
+    return db_api_get_project_items_ids
+
+
 def get_db_api_get_items_ids(*items):
     """Generate db_api.get_items_ids mock function."""
 
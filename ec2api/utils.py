@@ -15,12 +15,14 @@
 
 """Utilities and helper functions."""
 
+import collections
 import contextlib
 import hashlib
 import hmac
 import shutil
 import socket
 import tempfile
+import time
 from xml.sax import saxutils
 
 from oslo_config import cfg
@@ -113,3 +115,58 @@ def utf8(value):
         return value.encode('utf-8')
     assert isinstance(value, str)
     return value
+
+
+class TTLCache(object):
+    """Bounded in-memory cache with per-entry expiry and LRU eviction.
+
+    Entries older than ttl seconds are treated as absent. When more than
+    maxsize entries are stored, the least recently used one is dropped.
+    A zero ttl or maxsize disables caching entirely.
+
+    The cache is intended to be used from green threads of a single worker,
+    so no locking is performed: no operation here yields to the hub.
+    """
+
+    def __init__(self, maxsize, ttl, timer=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._data = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.pop(key, None)
+        if entry is None or entry[0] <= self._timer():
+            self.misses += 1
+            return default
+        # NOTE(ft): reinsert to mark the entry as the most recently used
+        self._data[key] = entry
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        self._data.pop(key, None)
+        self._data[key] = (self._timer() + ttl, value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return entry[1] if entry is not None else default
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        return {'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses}
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Microbenchmark of item writes of the DB API.
+
+Compares update_item and delete_item with their former read-modify-write
+implementations. Uses in-memory SQLite by default, pass a connection URL
+to run against a real DB:
+
+    python tools/db/item_write_benchmark.py [--count N] [connection]
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+
+from oslo_config import cfg
+
+from ec2api import config
+from ec2api import context as ec2_context
+from ec2api.db import migration
+from ec2api.db.sqlalchemy import api as db_api
+from ec2api.db.sqlalchemy import models
+
+
+def legacy_update_item(context, item):
+    item_ref = (db_api.model_query(context, models.Item).
+                filter_by(project_id=context.project_id,
+                          id=item["id"]).
+                one())
+    item_ref.update(db_api._pack_item_data(item))
+    item_ref.save()
+    return db_api._unpack_item_data(item_ref)
+
+
+def legacy_delete_item(context, item_id):
+    session = db_api.get_session()
+    deleted_count = (db_api.model_query(context, models.Item,
+                                        session=session).
+                     filter_by(project_id=context.project_id,
+                               id=item_id).
+                     delete(synchronize_session=False))
+    if not deleted_count:
+        return
+    try:
+        (db_api.model_query(context, models.Tag, session=session).
+         filter_by(project_id=context.project_id,
+                   item_id=item_id).
+         delete(synchronize_session=False))
+    except Exception:
+        # NOTE(ft): ignore all exceptions because DB integrity is insignificant
+        # for tags
+        pass
+
+
+def measure(name, func, args_list):
+    started_at = time.time()
+    for args in args_list:
+        func(*args)
+    elapsed = time.time() - started_at
+    print('%-20s %8.3f sec %8.1f usec/op' %
+          (name, elapsed, elapsed * 1000000 / len(args_list)))
+
+
+def add_items(context, count):
+    return [db_api.add_item(context, 'vpc',
+                            {'cidr_block': '10.0.0.0/16',
+                             'route_table_id': 'rtb-%08x' % i})
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('connection', nargs='?', default='sqlite://')
+    args = parser.parse_args()
+
+    config.parse_args([], default_config_files=[])
+    cfg.CONF.set_override('connection', args.connection, group='database')
+    migration.db_sync()
+    context = ec2_context.RequestContext('fake_user', 'fake_project')
+
+    items = add_items(context, args.count)
+    for item in items:
+        item['route_table_id'] = 'rtb-ffffffff'
+    measure('legacy update_item', legacy_update_item,
+            [(context, item) for item in items])
+    measure('update_item', db_api.update_item,
+            [(context, item) for item in items])
+
+    measure('legacy delete_item', legacy_delete_item,
+            [(context, item['id']) for item in items])
+    items = add_items(context, args.count)
+    measure('delete_item', db_api.delete_item,
+            [(context, item['id']) for item in items])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Microbenchmark of security groups formatting of DescribeSecurityGroups.
+
+Compares formatting with groups indexed by ids with the former scans of
+group lists for every rule. Groups are formatted for a quarter, a half
+and all of the requested number of groups, so the time per rule shows
+how formatting scales:
+
+    python tools/security_group_format_benchmark.py [--groups N] [--rules M]
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+import uuid
+
+from ec2api.api import security_group
+
+
+def legacy_translate_group_name(os_group, db_groups):
+    if (os_group['name'].startswith('vpc-') and db_groups and
+            next((g for g in db_groups
+                  if g['os_id'] == os_group['id'] and
+                  g['vpc_id'] == os_group['name']), None)):
+        return 'default'
+    return os_group['name']
+
+
+def legacy_format_rule(os_rule, security_groups, os_security_groups):
+    ec2_rule = {'ipProtocol': os_rule['protocol'],
+                'fromPort': os_rule['port_range_min'],
+                'toPort': os_rule['port_range_max']}
+    remote_group_id = os_rule['remote_group_id']
+    ec2_remote_group = {}
+    db_remote_group = next((g for g in security_groups
+                            if g['os_id'] == remote_group_id), None)
+    if db_remote_group is not None:
+        ec2_remote_group['groupId'] = db_remote_group['id']
+    os_remote_group = next((g for g in os_security_groups
+                            if g['id'] == remote_group_id), None)
+    if os_remote_group is not None:
+        ec2_remote_group['groupName'] = os_remote_group['name']
+        ec2_remote_group['userId'] = os_remote_group['tenant_id']
+    ec2_rule['groups'] = [ec2_remote_group]
+    return ec2_rule
+
+
+def legacy_format(db_groups, os_groups):
+    for os_group in os_groups:
+        os_group['name'] = legacy_translate_group_name(os_group, db_groups)
+    db_groups_by_os_id = dict((g['os_id'], g) for g in db_groups)
+    for os_group in os_groups:
+        db_group = db_groups_by_os_id[os_group['id']]
+        [legacy_format_rule(os_rule, db_groups, os_groups)
+         for os_rule in os_group['security_group_rules']]
+        # NOTE(ft): the rest of formatting doesn't depend on other groups
+        security_group._format_security_group(
+            db_group, dict(os_group, security_group_rules=[]), {}, {})
+
+
+def indexed_format(db_groups, os_groups):
+    db_groups_by_os_id = dict((g['os_id'], g) for g in db_groups)
+    for os_group in os_groups:
+        os_group['name'] = security_group._translate_group_name(
+            None, os_group, db_groups_by_os_id)
+    os_groups_by_id = dict((g['id'], g) for g in os_groups)
+    for os_group in os_groups:
+        security_group._format_security_group(
+            db_groups_by_os_id[os_group['id']], os_group,
+            db_groups_by_os_id, os_groups_by_id)
+
+
+def make_groups(group_count, rule_count):
+    os_ids = [str(uuid.uuid4()) for i in range(group_count)]
+    db_groups = [{'id': 'sg-%08x' % i,
+                  'os_id': os_id,
+                  'vpc_id': 'vpc-%08x' % (i % 10)}
+                 for i, os_id in enumerate(os_ids)]
+    os_groups = [{'id': os_id,
+                  'name': ('vpc-%08x' % (i % 10) if i < 10 else
+                           'group-%s' % i),
+                  'tenant_id': 'fake_project',
+                  'description': 'fake description',
+                  'security_group_rules': [
+                      {'protocol': 'tcp',
+                       'port_range_min': 1000 + j,
+                       'port_range_max': 1000 + j,
+                       'remote_group_id': os_ids[(i + j) % group_count],
+                       'remote_ip_prefix': None,
+                       'direction': 'ingress',
+                       'ethertype': 'IPv4'}
+                      for j in range(rule_count)]}
+                 for i, os_id in enumerate(os_ids)]
+    return db_groups, os_groups
+
+
+def measure(name, func, group_count, rule_count):
+    db_groups, os_groups = make_groups(group_count, rule_count)
+    started_at = time.time()
+    func(db_groups, os_groups)
+    elapsed = time.time() - started_at
+    print('%-8s %5s groups %8.3f sec %8.2f usec/rule' %
+          (name, group_count, elapsed,
+           elapsed * 1000000 / (group_count * rule_count)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--groups', type=int, default=500)
+    parser.add_argument('--rules', type=int, default=50)
+    args = parser.parse_args()
+
+    for name, func in (('legacy', legacy_format),
+                       ('indexed', indexed_format)):
+        for group_count in (args.groups // 4, args.groups // 2, args.groups):
+            measure(name, func, group_count, args.rules)
+
+
+if __name__ == '__main__':
+    main()